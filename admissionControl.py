@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from fastapi.responses import JSONResponse
+
+
+# Classes de endpoint: (concorrência, tamanho máximo da fila, espera máxima na fila em s, Retry-After em s)
+CLASSES_PADRAO = {
+    "heavy": (4, 16, 10.0, 5),         # LLM e áudio: caros em memória, threads e chamadas à OpenAI
+    "interactive": (16, 64, 5.0, 2),   # chat, busca e atualizações curtas do usuário
+    "cheap": (64, 256, 2.0, 1),        # leituras do dashboard e rota raiz
+    "export": (2, 4, 5.0, 30),         # exportações em massa: longas, ocupam uma conexão ao MySQL
+}
+
+# Rotas de cada classe; as demais caem em "cheap"
+ROTAS_POR_CLASSE = {
+    "heavy": {"/upload-audio", "/analyze-sentiment", "/api/generate-report"},
+    "interactive": {"/api/chat-agent", "/api/search", "/update-user-details"},
+    "export": {"/api/export/comentarios"},
+}
+
+# Rotas fora do controle: streams de longa duração e métricas (precisam responder durante a sobrecarga)
+PREFIXOS_ISENTOS = ("/api/dashboard/stream", "/api/metrics/")
+
+
+class EndpointClass:
+    def __init__(self, nome, limite, fila_maxima, espera_maxima, retry_after):
+        self.nome = nome
+        self.limite = limite
+        self.fila_maxima = fila_maxima
+        self.espera_maxima = espera_maxima
+        self.retry_after = retry_after
+        self.em_execucao = 0
+        self._fila = deque()
+        self._esperas = deque(maxlen=1000)
+        self.contadores = {"admitted": 0, "shed_queue_full": 0, "shed_timeout": 0}
+
+    # Aguarda uma vaga; devolve None se admitido ou o motivo da rejeição
+    async def entrar(self):
+        if self.em_execucao < self.limite and not self._fila:
+            self.em_execucao += 1
+            self.contadores["admitted"] += 1
+            self._esperas.append(0.0)
+            return None
+
+        if len(self._fila) >= self.fila_maxima:
+            self.contadores["shed_queue_full"] += 1
+            return "fila cheia"
+
+        vaga = asyncio.get_running_loop().create_future()
+        self._fila.append(vaga)
+        inicio = time.monotonic()
+        try:
+            await asyncio.wait_for(vaga, self.espera_maxima)
+        except asyncio.TimeoutError:
+            if not (vaga.done() and not vaga.cancelled()):
+                self.contadores["shed_timeout"] += 1
+                return "tempo de espera esgotado"
+        except asyncio.CancelledError:
+            # Cliente desconectou: devolve a vaga se ela chegou a ser concedida
+            if vaga.done() and not vaga.cancelled():
+                self.sair()
+            raise
+        finally:
+            if vaga in self._fila:
+                self._fila.remove(vaga)
+
+        self.contadores["admitted"] += 1
+        self._esperas.append(time.monotonic() - inicio)
+        return None
+
+    # Libera a vaga, repassando-a diretamente ao próximo da fila
+    def sair(self):
+        while self._fila:
+            vaga = self._fila.popleft()
+            if not vaga.done():
+                vaga.set_result(True)
+                return
+        self.em_execucao -= 1
+
+    def metrics(self):
+        esperas = sorted(self._esperas)
+        return {
+            "in_flight": self.em_execucao,
+            "concurrency_limit": self.limite,
+            "queue_depth": len(self._fila),
+            "queue_limit": self.fila_maxima,
+            "wait_p50_ms": round(esperas[len(esperas) // 2] * 1000, 2) if esperas else 0.0,
+            "wait_p95_ms": round(esperas[int(len(esperas) * 0.95)] * 1000, 2) if esperas else 0.0,
+            "wait_max_ms": round(esperas[-1] * 1000, 2) if esperas else 0.0,
+            **self.contadores,
+        }
+
+
+class AdmissionController:
+    def __init__(self, classes=None, rotas=None, isentos=PREFIXOS_ISENTOS):
+        classes = CLASSES_PADRAO if classes is None else classes
+        self.classes = {nome: EndpointClass(nome, *config) for nome, config in classes.items()}
+        self._classe_da_rota = {}
+        for nome, caminhos in (ROTAS_POR_CLASSE if rotas is None else rotas).items():
+            for caminho in caminhos:
+                self._classe_da_rota[caminho] = nome
+        self.isentos = isentos
+
+    # Os limites podem ser ajustados por variáveis como ADMISSION_HEAVY_CONCURRENCY e ADMISSION_CHEAP_QUEUE
+    @classmethod
+    def from_env(cls):
+        classes = {}
+        for nome, (limite, fila, espera, retry_after) in CLASSES_PADRAO.items():
+            prefixo = f"ADMISSION_{nome.upper()}"
+            classes[nome] = (
+                int(os.getenv(f"{prefixo}_CONCURRENCY", limite)),
+                int(os.getenv(f"{prefixo}_QUEUE", fila)),
+                float(os.getenv(f"{prefixo}_TIMEOUT", espera)),
+                int(os.getenv(f"{prefixo}_RETRY_AFTER", retry_after)),
+            )
+        return cls(classes)
+
+    def classify(self, path):
+        if path.startswith(self.isentos):
+            return None
+        nome = self._classe_da_rota.get(path.rstrip("/") or "/", "cheap")
+        return self.classes[nome]
+
+    def metrics(self):
+        return {nome: classe.metrics() for nome, classe in self.classes.items()}
+
+
+# Middleware ASGI: limita a concorrência por classe de endpoint e descarta rápido (503) quando a fila enche
+class AdmissionMiddleware:
+    def __init__(self, app, controller=None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        classe = self.controller.classify(scope["path"])
+        if classe is None:
+            await self.app(scope, receive, send)
+            return
+
+        motivo = await classe.entrar()
+        if motivo is not None:
+            resposta = JSONResponse(
+                content={"error": f"Servidor sobrecarregado ({classe.nome}: {motivo}). Tente novamente."},
+                status_code=503,
+                headers={"Retry-After": str(classe.retry_after)},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            classe.sair()
+
+
+# Instância única compartilhada pelo middleware e pelo endpoint de métricas
+admission = AdmissionController.from_env()
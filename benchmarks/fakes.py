@@ -0,0 +1,801 @@
+"""Substitutos locais para OpenAI, Pinecone e MySQL usados pelos benchmarks.
+
+Nenhum serviço pago é chamado: a API da OpenAI é servida por um servidor HTTP
+local (o cliente oficial continua serializando e fazendo a requisição de
+verdade), enquanto Pinecone e MySQL são substituídos em processo. Chame
+`install_fakes()` ANTES de importar `main`, pois os módulos do backend
+conectam aos serviços no momento do import.
+"""
+
+import asyncio
+import base64
+import os
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pinecone
+import pymysql
+import tiktoken
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from commentQueries import MIN_TOKEN_FULLTEXT, STOPWORDS_FULLTEXT
+
+
+EMBEDDING_DIMENSION = 1536
+
+UNIDADES_PADRAO = ["Centro", "Zona Sul", "Zona Norte", "Barra", "Niterói"]
+SENTIMENTOS_PADRAO = ["positivo", "negativo", "neutro"]
+
+COMENTARIOS_EXEMPLO = [
+    "A comida estava excelente e o atendimento foi muito rápido.",
+    "Demoraram quase uma hora para trazer o pedido, muito ruim.",
+    "O ambiente é agradável, mas a música estava alta demais.",
+    "Preço justo e porções bem servidas, voltarei com certeza.",
+    "O garçom foi grosseiro e a mesa estava suja.",
+    "Nada de especial, comida ok e atendimento normal.",
+    "A sobremesa estava divina, parabéns ao chef!",
+    "Pedi sem cebola e veio com cebola, faltou atenção.",
+]
+
+
+# Vocabulário do corpus sintético da busca: combinações dão milhões de comentários distintos
+ASPECTOS_SINTETICOS = ["atendimento", "garçom", "preço", "ambiente", "tempo de espera", "estacionamento",
+                       "música", "limpeza", "cardápio", "entrega", "reserva", "banheiro", "fila", "caixa"]
+PRATOS_SINTETICOS = ["pizza", "hambúrguer", "salada", "feijoada", "sobremesa", "café", "suco", "massa",
+                     "picanha", "sushi", "risoto", "moqueca", "pastel", "chope", "vinho", "batata frita"]
+OPINIOES_SINTETICAS = ["excelente", "muito bom", "razoável", "ruim", "péssimo", "demorado", "frio",
+                       "caro", "barato", "agradável", "barulhento", "impecável", "confuso", "rápido"]
+MODELOS_SINTETICOS = [
+    "O {aspecto} estava {opiniao} e a {prato} {opiniao2}.",
+    "{prato} {opiniao}, mas o {aspecto} foi {opiniao2}.",
+    "Achei o {aspecto} {opiniao}; pedi {prato} e estava {opiniao2}.",
+    "Voltaria pela {prato}, apesar do {aspecto} {opiniao}.",
+    "{aspecto} {opiniao} hoje. {prato} {opiniao2} como sempre.",
+]
+
+
+# Gera um comentário sintético; aspectos e pratos seguem a lei de Zipf (alguns muito mais comuns), como em texto real
+def synthetic_comment(rng: random.Random) -> str:
+    def escolher(opcoes):
+        return rng.choices(opcoes, weights=[1 / posicao for posicao in range(1, len(opcoes) + 1)])[0]
+
+    return rng.choice(MODELOS_SINTETICOS).format(
+        aspecto=escolher(ASPECTOS_SINTETICOS),
+        prato=escolher(PRATOS_SINTETICOS),
+        opiniao=rng.choice(OPINIOES_SINTETICAS),
+        opiniao2=rng.choice(OPINIOES_SINTETICAS),
+    )
+
+
+# Configuração das latências e da injeção de erros dos substitutos
+@dataclass
+class FakeConfig:
+    openai_latency_ms: float = 50.0
+    openai_jitter_ms: float = 10.0
+    openai_error_rate: float = 0.0
+    openai_error_status: int = 429
+    openai_retry_after: float = 1.0
+    completion_words: int = 120
+    transcription_text: str = "Gostei muito da comida, mas o atendimento demorou bastante."
+    pinecone_latency_ms: float = 20.0
+    mysql_latency_ms: float = 2.0
+    sentimentos: list = field(default_factory=lambda: list(SENTIMENTOS_PADRAO))
+
+
+############################################## TOKENIZADOR OFFLINE ##############################################
+
+
+# Registra um tokenizador byte a byte quando as codificações do tiktoken não podem ser baixadas
+def install_offline_tiktoken():
+    try:
+        tiktoken.get_encoding("cl100k_base")
+        return False
+    except Exception:
+        pass
+
+    # Cada byte vira um token: superestima a contagem real, o que é seguro para orçamentos
+    encoding = tiktoken.Encoding(
+        name="cl100k_base",
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    for nome in ("cl100k_base", "o200k_base"):
+        tiktoken.registry.ENCODINGS[nome] = encoding
+    print("[WARN] Codificações do tiktoken indisponíveis; usando tokenizador offline byte a byte.")
+    return True
+
+
+############################################## OPENAI (SERVIDOR HTTP LOCAL) ##############################################
+
+
+# Gera um vetor determinístico "bag of words": textos com palavras em comum ficam próximos
+def fake_embedding(conteudo) -> np.ndarray:
+    if isinstance(conteudo, list):
+        conteudo = tiktoken.get_encoding("cl100k_base").decode(conteudo)
+    vetor = np.zeros(EMBEDDING_DIMENSION, dtype=np.float32)
+    for palavra in re.findall(r"\w+", conteudo.lower()):
+        hash_palavra = zlib.crc32(palavra.encode("utf-8"))
+        vetor[hash_palavra % EMBEDDING_DIMENSION] += 1.0 if hash_palavra & 1 else -1.0
+    norma = np.linalg.norm(vetor)
+    if norma == 0:
+        vetor[0], norma = 1.0, 1.0
+    return vetor / norma
+
+
+def _estimate_tokens(texto: str) -> int:
+    return max(1, len(texto) // 4)
+
+
+def create_fake_openai_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI()
+    app.state.stats = {"chat": 0, "embeddings": 0, "transcriptions": 0, "errors": 0}
+
+    # Aplica a latência configurada e, eventualmente, devolve um erro injetado
+    async def simulate(tipo):
+        app.state.stats[tipo] += 1
+        atraso = config.openai_latency_ms + random.uniform(0, config.openai_jitter_ms)
+        await asyncio.sleep(atraso / 1000)
+        if config.openai_error_rate and random.random() < config.openai_error_rate:
+            app.state.stats["errors"] += 1
+            return JSONResponse(
+                content={"error": {"message": "Erro injetado pelo benchmark", "type": "fake_error"}},
+                status_code=config.openai_error_status,
+                headers={"retry-after": str(config.openai_retry_after)},
+            )
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        erro = await simulate("chat")
+        if erro:
+            return erro
+        body = await request.json()
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+
+        # O agente de sentimento (ReAct) só aceita respostas com "Final Answer"
+        if "Final Answer" in prompt:
+            content = f"Final Answer: {random.choice(config.sentimentos)}"
+        else:
+            palavras = " ".join(COMENTARIOS_EXEMPLO).split()
+            content = " ".join(random.choice(palavras) for _ in range(config.completion_words))
+
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        erro = await simulate("embeddings")
+        if erro:
+            return erro
+        body = await request.json()
+        entradas = body["input"]
+
+        # Aceita string, lista de strings, lista de tokens ou lista de listas de tokens
+        if isinstance(entradas, str) or (entradas and isinstance(entradas[0], int)):
+            entradas = [entradas]
+
+        data = []
+        for i, entrada in enumerate(entradas):
+            vetor = fake_embedding(entrada)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vetor.tobytes()).decode("ascii")
+            else:
+                embedding = vetor.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+        tokens = sum(len(e) if isinstance(e, list) else _estimate_tokens(e) for e in entradas)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        erro = await simulate("transcriptions")
+        if erro:
+            return erro
+        await request.form()  # Consome o upload multipart como a API real
+        return {"text": config.transcription_text}
+
+    return app
+
+
+# Servidor uvicorn rodando em uma thread própria, fora do event loop do backend
+class FakeOpenAIServer:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.app = create_fake_openai_app(config)
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        )
+        self._thread = None
+
+    @property
+    def stats(self):
+        return self.app.state.stats
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        inicio = time.monotonic()
+        while not self._server.started:
+            if time.monotonic() - inicio > 10:
+                raise RuntimeError("Servidor OpenAI falso não iniciou em 10 segundos.")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+############################################## PINECONE (EM PROCESSO) ##############################################
+
+
+# Avalia o subconjunto de filtros de metadata do Pinecone ($eq, $in, $gte, $and...)
+def _match_filter(metadata: dict, filtro: dict) -> bool:
+    if not filtro:
+        return True
+    for chave, condicao in filtro.items():
+        if chave == "$and":
+            if not all(_match_filter(metadata, f) for f in condicao):
+                return False
+            continue
+        if chave == "$or":
+            if not any(_match_filter(metadata, f) for f in condicao):
+                return False
+            continue
+
+        valor = metadata.get(chave)
+        if not isinstance(condicao, dict):
+            condicao = {"$eq": condicao}
+        for operador, esperado in condicao.items():
+            if operador == "$eq" and valor != esperado:
+                return False
+            if operador == "$ne" and valor == esperado:
+                return False
+            if operador == "$in" and valor not in esperado:
+                return False
+            if operador == "$nin" and valor in esperado:
+                return False
+            if operador in ("$gt", "$gte", "$lt", "$lte"):
+                if valor is None:
+                    return False
+                if operador == "$gt" and not valor > esperado:
+                    return False
+                if operador == "$gte" and not valor >= esperado:
+                    return False
+                if operador == "$lt" and not valor < esperado:
+                    return False
+                if operador == "$lte" and not valor <= esperado:
+                    return False
+    return True
+
+
+class FakeIndex:
+    # Armazenamento compartilhado entre instâncias: {índice: {namespace: {id: (vetor, metadata)}}}
+    _stores = {}
+    # Matriz de vetores por (índice, namespace), refeita só depois de gravações
+    _matrizes = {}
+    _lock_matrizes = threading.Lock()
+    latency_ms = 0.0
+
+    def __init__(self, name=None, host=None, **kwargs):
+        self.name = name or "sym-comentarios"
+        self._namespaces = FakeIndex._stores.setdefault(self.name, {})
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        if FakeIndex.latency_ms:
+            time.sleep(FakeIndex.latency_ms / 1000)
+
+    def upsert(self, vectors, namespace="", **kwargs):
+        self._sleep()
+        store = self._namespaces.setdefault(namespace, {})
+        with self._lock:
+            for v in vectors:
+                if isinstance(v, dict):
+                    vid, valores, metadata = v["id"], v["values"], v.get("metadata") or {}
+                else:
+                    vid, valores, metadata = v[0], v[1], (v[2] if len(v) > 2 else {})
+                store[str(vid)] = (np.asarray(valores, dtype=np.float32), dict(metadata))
+            self._invalidar(namespace)
+        return {"upserted_count": len(vectors)}
+
+    def fetch(self, ids, namespace="", **kwargs):
+        self._sleep()
+        store = self._namespaces.get(namespace, {})
+        vectors = {
+            i: {"id": i, "values": store[i][0].tolist(), "metadata": dict(store[i][1])}
+            for i in ids if i in store
+        }
+        return {"vectors": vectors, "namespace": namespace}
+
+    def update(self, id, values=None, set_metadata=None, namespace="", **kwargs):
+        self._sleep()
+        store = self._namespaces.get(namespace, {})
+        with self._lock:
+            if id in store:
+                vetor, metadata = store[id]
+                if values is not None:
+                    vetor = np.asarray(values, dtype=np.float32)
+                if set_metadata:
+                    metadata = {**metadata, **set_metadata}
+                store[id] = (vetor, metadata)
+                self._invalidar(namespace)
+        return {}
+
+    def delete(self, ids=None, delete_all=False, namespace="", **kwargs):
+        store = self._namespaces.setdefault(namespace, {})
+        with self._lock:
+            if delete_all:
+                store.clear()
+            for i in ids or []:
+                store.pop(i, None)
+            self._invalidar(namespace)
+        return {}
+
+    def _invalidar(self, namespace):
+        with FakeIndex._lock_matrizes:
+            FakeIndex._matrizes.pop((self.name, namespace), None)
+
+    # (ids, matriz, normas, metadatas) do namespace; evita empilhar todos os vetores a cada consulta
+    def _matriz(self, namespace):
+        chave = (self.name, namespace)
+        with FakeIndex._lock_matrizes:
+            cache = FakeIndex._matrizes.get(chave)
+            if cache is None:
+                store = dict(self._namespaces.get(namespace, {}))
+                ids = list(store)
+                if ids:
+                    matriz = np.stack([store[i][0] for i in ids])
+                else:
+                    matriz = np.zeros((0, EMBEDDING_DIMENSION), dtype=np.float32)
+                cache = (ids, matriz, np.linalg.norm(matriz, axis=1), [store[i][1] for i in ids])
+                FakeIndex._matrizes[chave] = cache
+        return cache
+
+    def query(self, vector=None, top_k=10, namespace="", filter=None,
+              include_metadata=False, include_values=False, **kwargs):
+        self._sleep()
+        ids, matriz, normas, metadatas = self._matriz(namespace)
+        if filter:
+            posicoes = np.fromiter((i for i, m in enumerate(metadatas) if _match_filter(m, filter)), dtype=np.int64)
+        else:
+            posicoes = np.arange(len(ids))
+        if not len(posicoes):
+            return {"matches": [], "namespace": namespace}
+
+        consulta = np.asarray(vector, dtype=np.float32).reshape(-1)
+        divisor = normas * np.linalg.norm(consulta)
+        scores = (matriz @ consulta / np.where(divisor == 0, 1, divisor))[posicoes]
+        k = min(top_k, len(posicoes))
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        ordem = melhores[np.argsort(-scores[melhores])]
+
+        matches = []
+        for pos in ordem:
+            linha = posicoes[pos]
+            match = {"id": ids[linha], "score": float(scores[pos])}
+            if include_metadata:
+                match["metadata"] = dict(metadatas[linha])
+            if include_values:
+                match["values"] = matriz[linha].tolist()
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    # Pagina os ids do namespace, como Index.list dos índices serverless
+    def list(self, prefix=None, limit=100, namespace="", **kwargs):
+        ids = sorted(i for i in self._namespaces.get(namespace, {}) if not prefix or i.startswith(prefix))
+        for inicio in range(0, len(ids), limit):
+            yield ids[inicio:inicio + limit]
+
+    def describe_index_stats(self, filter=None, **kwargs):
+        namespaces = {ns: {"vector_count": len(store)} for ns, store in self._namespaces.items()}
+        return {
+            "dimension": EMBEDDING_DIMENSION,
+            "namespaces": namespaces,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+        }
+
+
+class FakeIndexDescription:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeIndexList(list):
+    def names(self):
+        return [i.name for i in self]
+
+
+class FakePinecone:
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+
+    def list_indexes(self):
+        return FakeIndexList(FakeIndexDescription(nome) for nome in FakeIndex._stores)
+
+    def create_index(self, name, **kwargs):
+        FakeIndex._stores.setdefault(name, {})
+
+    def Index(self, name=None, host=None, **kwargs):
+        return FakeIndex(name=name, host=host)
+
+
+############################################## MYSQL (SQLITE EM PROCESSO) ##############################################
+
+
+SCHEMA_COMENTARIOS = """
+CREATE TABLE IF NOT EXISTS comentarios_clientes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    comentario TEXT,
+    sentimento TEXT,
+    nome_cliente TEXT,
+    email TEXT,
+    unidade TEXT,
+    data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+# Índice FULLTEXT do MySQL (migrations/001_comentarios_fulltext.sql) emulado com FTS5, mantido por triggers
+SCHEMA_FULLTEXT = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS comentarios_clientes_ft USING fts5(
+        comentario, content='comentarios_clientes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comentarios_clientes_ft_ai AFTER INSERT ON comentarios_clientes BEGIN
+        INSERT INTO comentarios_clientes_ft(rowid, comentario) VALUES (new.id, new.comentario);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comentarios_clientes_ft_ad AFTER DELETE ON comentarios_clientes BEGIN
+        INSERT INTO comentarios_clientes_ft(comentarios_clientes_ft, rowid, comentario)
+        VALUES ('delete', old.id, old.comentario);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comentarios_clientes_ft_au AFTER UPDATE OF comentario ON comentarios_clientes BEGIN
+        INSERT INTO comentarios_clientes_ft(comentarios_clientes_ft, rowid, comentario)
+        VALUES ('delete', old.id, old.comentario);
+        INSERT INTO comentarios_clientes_ft(rowid, comentario) VALUES (new.id, new.comentario);
+    END
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_comentarios_unidade_sentimento_data "
+    "ON comentarios_clientes (unidade, sentimento, data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_comentarios_data_hora ON comentarios_clientes (data_hora)",
+]
+
+# MATCH(comentario) AGAINST (? IN NATURAL LANGUAGE | BOOLEAN MODE), já com o paramstyle do sqlite
+_MATCH_AGAINST = re.compile(
+    r"MATCH\s*\(\s*comentario\s*\)\s*AGAINST\s*\(\s*\?\s+IN\s+(NATURAL\s+LANGUAGE|BOOLEAN)\s+MODE\s*\)"
+    r"(\s+AS\s+\w+)?",
+    re.IGNORECASE,
+)
+
+
+# Expressões que substituem MATCH ... AGAINST depois que as relevâncias foram calculadas na tabela temporária
+def _expressao_fulltext(tabela, alias):
+    if alias:
+        return f"(SELECT score FROM {tabela} WHERE id = comentarios_clientes.id){alias}"
+    return f"comentarios_clientes.id IN (SELECT id FROM {tabela})"
+
+
+# Traduz a busca para a sintaxe do FTS5. Modo natural: qualquer termo com 3+ caracteres
+# (innodb_ft_min_token_size) conta. Modo booleano: termos com + são obrigatórios e com - excluídos.
+def _fts_query(texto, booleano=False):
+    termos = [t for t in re.findall(r"[+-]?\w+", (texto or "").lower()) if len(t.lstrip("+-")) >= MIN_TOKEN_FULLTEXT]
+    # Como no InnoDB, stopwords não estão no índice: um +stopword não casa com nada e as demais são ignoradas
+    if booleano and any(t.startswith("+") and t[1:] in STOPWORDS_FULLTEXT for t in termos):
+        return '"__sem_termos__"'
+    termos = [t for t in termos if t.lstrip("+-") not in STOPWORDS_FULLTEXT]
+    obrigatorios = [t[1:] for t in termos if booleano and t.startswith("+")]
+    excluidos = [t[1:] for t in termos if booleano and t.startswith("-")]
+    opcionais = [t.lstrip("+-") for t in termos if not booleano or t[0] not in "+-"]
+    if obrigatorios:
+        consulta = " AND ".join(f'"{t}"' for t in dict.fromkeys(obrigatorios))
+    elif opcionais:
+        consulta = " OR ".join(f'"{t}"' for t in dict.fromkeys(opcionais))
+    else:
+        return '"__sem_termos__"'
+    for termo in dict.fromkeys(excluidos):
+        consulta = f'({consulta}) NOT "{termo}"'
+    return consulta
+
+
+def _dict_factory(cursor, row):
+    return {col[0]: row[i] for i, col in enumerate(cursor.description)}
+
+
+class FakeMySQLCursor:
+    def __init__(self, connection, latency_ms, cursorclass):
+        self._cursor = connection.cursor()
+        # Cursores Dict* devolvem dicionários; os demais (Cursor, SSCursor) devolvem tuplas
+        if issubclass(cursorclass, pymysql.cursors.DictCursorMixin):
+            self._cursor.row_factory = _dict_factory
+        self._latency_ms = latency_ms
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def execute(self, query, args=None):
+        if self._latency_ms:
+            time.sleep(self._latency_ms / 1000)
+        # Converte o paramstyle do pymysql (%s) para o do sqlite (?)
+        query = query.strip().rstrip(";").replace("%s", "?").replace("%%", "%")
+        if re.match(r"START\s+TRANSACTION", query, re.IGNORECASE):
+            # WITH CONSISTENT SNAPSHOT: no sqlite o snapshot de leitura começa na primeira leitura da transação
+            self._cursor.execute("BEGIN")
+            self._cursor.execute("SELECT 1 FROM comentarios_clientes LIMIT 1").fetchall()
+            return 0
+        query, args = self._traduzir_fulltext(query, args)
+        self._cursor.execute(query, tuple(args) if args is not None else ())
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount if self.rowcount >= 0 else 0
+
+    # Calcula a relevância (bm25 do FTS5) de cada texto buscado uma única vez, numa tabela temporária,
+    # e troca MATCH ... AGAINST por consultas a ela, consumindo o parâmetro correspondente
+    def _traduzir_fulltext(self, query, args):
+        if not _MATCH_AGAINST.search(query):
+            return query, args
+        args = list(args or ())
+        partes, novos_args, tabelas = [], [], {}
+        ultimo = consumidos = 0
+        for match in _MATCH_AGAINST.finditer(query):
+            antes = query[ultimo:match.start()]
+            n = antes.count("?")
+            novos_args.extend(args[consumidos:consumidos + n])
+            busca = (args[consumidos + n], match.group(1).upper() == "BOOLEAN")
+            consumidos += n + 1
+            if busca not in tabelas:
+                tabelas[busca] = f"temp.fulltext_scores_{len(tabelas)}"
+                self._cursor.execute(f"DROP TABLE IF EXISTS {tabelas[busca]}")
+                self._cursor.execute(f"CREATE TABLE {tabelas[busca]} (id INTEGER PRIMARY KEY, score REAL)")
+                self._cursor.execute(
+                    f"INSERT INTO {tabelas[busca]} SELECT rowid, -bm25(comentarios_clientes_ft) "
+                    "FROM comentarios_clientes_ft WHERE comentarios_clientes_ft MATCH ?",
+                    (_fts_query(*busca),),
+                )
+            partes.append(antes + _expressao_fulltext(tabelas[busca], match.group(2)))
+            ultimo = match.end()
+        partes.append(query[ultimo:])
+        novos_args.extend(args[consumidos:])
+        return "".join(partes), novos_args
+
+    def executemany(self, query, args):
+        total = 0
+        for linha in args:
+            total += self.execute(query, linha)
+        return total
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeMySQLConnection:
+    def __init__(self, path, latency_ms, cursorclass):
+        # PARSE_DECLTYPES devolve data_hora como datetime, como o pymysql faz
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._latency_ms = latency_ms
+        self._cursorclass = cursorclass
+        self.open = True
+
+    def cursor(self, cursor=None):
+        return FakeMySQLCursor(self._conn, self._latency_ms, cursor or self._cursorclass)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        return True
+
+    def close(self):
+        if self.open:
+            self._conn.close()
+            self.open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeMySQL:
+    def __init__(self, config: FakeConfig, path=None):
+        self.config = config
+        self.path = path or os.path.join(tempfile.mkdtemp(prefix="sym-bench-"), "mysql.sqlite3")
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA_COMENTARIOS)
+            for comando in SCHEMA_FULLTEXT:
+                conn.execute(comando)
+
+    # Mesma assinatura de pymysql.connect; os parâmetros de conexão são ignorados
+    def connect(self, *args, cursorclass=pymysql.cursors.Cursor, **kwargs):
+        return FakeMySQLConnection(self.path, self.config.mysql_latency_ms, cursorclass)
+
+
+############################################## INSTALAÇÃO E DADOS INICIAIS ##############################################
+
+
+class Fakes:
+    def __init__(self, config, openai_server, mysql, temp_dir=None):
+        self.config = config
+        self.openai_server = openai_server
+        self.mysql = mysql
+        self.temp_dir = temp_dir
+
+    # Conexão usada para popular a tabela: o sqlite do substituto ou, sem ele, o MySQL real das variáveis de ambiente
+    def _conectar_mysql(self):
+        if self.mysql is not None:
+            conn = sqlite3.connect(self.mysql.path)
+            conn.execute("PRAGMA cache_size=-262144")  # 256 MB: índices e FTS crescem sem ir ao disco
+            return conn, "?"
+        conn = pymysql.connect(
+            host=os.getenv("MYSQL_HOST"),
+            user=os.getenv("MYSQL_USER"),
+            password=os.getenv("MYSQL_PASSWORD"),
+            database=os.getenv("MYSQL_DATABASE"),
+            charset="utf8mb4",
+        )
+        return conn, "%s"
+
+    # Popula MySQL e Pinecone com comentários sintéticos dos últimos `dias`, em blocos de `bloco` linhas.
+    # `gerador(rng, i)` produz o texto; `vetores` limita quantos comentários também vão ao Pinecone.
+    def seed(self, total=1000, unidades=None, dias=30, namespace="comentarios_namespace",
+             gerador=None, vetores=None, bloco=100000):
+        unidades = unidades or UNIDADES_PADRAO
+        gerador = gerador or (lambda rng, i: f"{rng.choice(COMENTARIOS_EXEMPLO)} (#{i})")
+        limite_vetores = total if vetores is None else min(vetores, total)
+        rng = random.Random(42)
+        agora = datetime.now(timezone.utc)
+        index = FakeIndex("sym-comentarios")
+
+        conn, marcador = self._conectar_mysql()
+        insert = (
+            "INSERT INTO comentarios_clientes (comentario, sentimento, nome_cliente, email, unidade, data_hora) "
+            f"VALUES ({', '.join([marcador] * 6)})"
+        )
+        vetores = []
+        try:
+            for inicio in range(0, total, bloco):
+                linhas = []
+                for i in range(inicio, min(inicio + bloco, total)):
+                    comentario = gerador(rng, i)
+                    sentimento = rng.choice(self.config.sentimentos)
+                    unidade = rng.choice(unidades)
+                    data_hora = agora - timedelta(days=rng.uniform(0, dias))
+                    linhas.append((comentario, sentimento, f"Cliente {i}", f"cliente{i}@exemplo.com",
+                                   unidade, data_hora.strftime("%Y-%m-%d %H:%M:%S")))
+
+                cursor = conn.cursor()
+                cursor.executemany(insert, linhas)
+                cursor.execute("SELECT MAX(id) FROM comentarios_clientes")
+                ultimo_id = cursor.fetchone()[0]
+                cursor.close()
+                conn.commit()
+
+                # Sem outras gravações concorrentes, os ids do bloco são consecutivos
+                primeiro_id = ultimo_id - len(linhas) + 1
+                for offset, (comentario, sentimento, nome, email, unidade, data_hora) in enumerate(linhas):
+                    if len(vetores) >= limite_vetores:
+                        break
+                    vetores.append({
+                        "id": str(primeiro_id + offset),
+                        "values": fake_embedding(comentario),
+                        "metadata": {
+                            "comentario": comentario,
+                            "sentimento": sentimento,
+                            "timestamp": data_hora,
+                            "timestamp_epoch": int(datetime.strptime(data_hora, "%Y-%m-%d %H:%M:%S")
+                                                   .replace(tzinfo=timezone.utc).timestamp()),
+                            "nome": nome,
+                            "email": email,
+                            "unidade": unidade,
+                        },
+                    })
+        finally:
+            conn.close()
+
+        index.upsert(vectors=vetores, namespace=namespace)
+        return total
+
+    def stop(self):
+        self.openai_server.stop()
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+# Substitui os serviços externos; deve ser chamada antes de `import main`.
+# Com `mysql=False` o backend usa o MySQL real configurado em MYSQL_* (OpenAI e Pinecone continuam locais).
+def install_fakes(config: FakeConfig = None, mysql: bool = True) -> Fakes:
+    config = config or FakeConfig()
+
+    install_offline_tiktoken()
+
+    openai_server = FakeOpenAIServer(config).start()
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["OPENAI_BASE_URL"] = openai_server.base_url
+    os.environ["OPENAI_API_BASE"] = openai_server.base_url
+
+    FakeIndex.latency_ms = config.pinecone_latency_ms
+    FakeIndex._stores.setdefault("sym-comentarios", {}).setdefault("comentarios_namespace", {})
+    os.environ["PINECONE_API_KEY"] = "pc-benchmark"
+
+    # Áudios enviados durante a carga ficam fora de ./temp_files do repositório
+    temp_dir = tempfile.mkdtemp(prefix="sym-bench-audio-")
+    os.environ["TEMP_DIR"] = temp_dir
+    pinecone.Pinecone = FakePinecone
+    pinecone.Index = FakeIndex
+
+    fake_mysql = None
+    if mysql:
+        fake_mysql = FakeMySQL(config)
+        pymysql.connect = fake_mysql.connect
+
+    return Fakes(config, openai_server, fake_mysql, temp_dir)
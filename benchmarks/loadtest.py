@@ -0,0 +1,328 @@
+"""Gerador de carga offline para os endpoints do backend SYM-Gestor.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.loadtest
+    python -m benchmarks.loadtest --scenarios generate_report chat_agent --requests 200 --concurrency 20
+    python -m benchmarks.loadtest --openai-latency-ms 300 --openai-error-rate 0.05
+
+Cada cenário reporta vazão, latências p50/p95/p99 e memória. Os resultados são
+acrescentados em benchmarks/results/history.jsonl e comparados com a execução
+anterior de mesma configuração, para que regressões fiquem visíveis.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.fakes import FakeConfig, install_fakes
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+HISTORY_FILE = os.path.join(RESULTS_DIR, "history.jsonl")
+
+AUDIO_FALSO = b"ID3" + bytes(32 * 1024)
+
+
+# Cada cenário devolve os argumentos de uma requisição httpx
+SCENARIOS = {
+    "root": lambda i: ("GET", "/", {}),
+    "upload_audio": lambda i: (
+        "POST", "/upload-audio/", {"files": {"file": (f"benchmark_audio_{i}.mp3", AUDIO_FALSO, "audio/mpeg")}}
+    ),
+    "analyze_sentiment": lambda i: (
+        "POST", "/analyze-sentiment/", {"params": {"transcription": f"A comida estava ótima, pedido {i}"}}
+    ),
+    "generate_report": lambda i: (
+        "POST", "/api/generate-report",
+        {"json": {"meta": "Atingir 80% de comentários positivos", "query": "atendimento demorado"}},
+    ),
+    "chat_agent": lambda i: (
+        "POST", "/api/chat-agent", {"json": {"message": "Como melhorar o tempo de atendimento?"}}
+    ),
+    "dashboard_comments_by_unit": lambda i: ("GET", "/api/dashboard/comments-by-unit", {}),
+    "dashboard_sentiment_by_unit": lambda i: ("GET", "/api/dashboard/sentiment-by-unit", {}),
+    "dashboard_sentiment_trend": lambda i: ("GET", "/api/dashboard/sentiment-trend", {}),
+}
+
+
+# Percentil pelo método nearest-rank sobre uma lista ordenada
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    posicao = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados) + 0.5) - 1))
+    return valores_ordenados[posicao]
+
+
+# Memória residente atual do processo em MB (Linux); None em outros sistemas
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+# Dispara `total` requisições com no máximo `concorrencia` simultâneas
+async def run_scenario(client, nome, total, concorrencia, trace_memory):
+    montar_requisicao = SCENARIOS[nome]
+    latencias, status = [], {}
+    proximo = iter(range(total))
+
+    async def worker():
+        for i in proximo:
+            metodo, caminho, kwargs = montar_requisicao(i)
+            inicio = time.perf_counter()
+            try:
+                resposta = await client.request(metodo, caminho, **kwargs)
+                codigo = resposta.status_code
+            except Exception as e:
+                codigo = type(e).__name__
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            status[str(codigo)] = status.get(str(codigo), 0) + 1
+
+    rss_inicial = rss_mb()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    erros = sum(n for codigo, n in status.items() if not codigo.startswith(("2", "3")))
+    resultado = {
+        "scenario": nome,
+        "requests": total,
+        "concurrency": concorrencia,
+        "duration_s": round(duracao, 3),
+        "throughput_rps": round(total / duracao, 2) if duracao else None,
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p95_ms": round(percentil(latencias, 95), 2),
+        "p99_ms": round(percentil(latencias, 99), 2),
+        "max_ms": round(latencias[-1], 2),
+        "error_rate": round(erros / total, 4),
+        "status": status,
+        "rss_mb": round(rss_mb(), 1) if rss_inicial is not None else None,
+        "rss_delta_mb": round(rss_mb() - rss_inicial, 1) if rss_inicial is not None else None,
+    }
+    if trace_memory:
+        resultado["py_peak_mb"] = round((tracemalloc.get_traced_memory()[1] - memoria_inicial) / (1024 * 1024), 2)
+    return resultado
+
+
+# Mantém `concorrencia` requisições do cenário em andamento até `parar` ser sinalizado (carga de fundo)
+async def background_load(client, nome, concorrencia, parar):
+    montar_requisicao = SCENARIOS[nome]
+    status = {}
+
+    async def worker():
+        i = 0
+        while not parar.is_set():
+            metodo, caminho, kwargs = montar_requisicao(i)
+            try:
+                codigo = (await client.request(metodo, caminho, **kwargs)).status_code
+            except Exception as e:
+                codigo = type(e).__name__
+            status[str(codigo)] = status.get(str(codigo), 0) + 1
+            i += 1
+            # Respostas descartadas (503) voltam sem ceder o event loop; sem isto o fundo monopoliza o loop
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    return status
+
+
+def load_history():
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    with open(HISTORY_FILE, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def save_history(registros):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+# Só compara execuções com a mesma carga e os mesmos substitutos
+def _chave_comparacao(registro):
+    return (
+        registro["scenario"],
+        registro["requests"],
+        registro["concurrency"],
+        json.dumps(registro.get("fakes", {}), sort_keys=True),
+        json.dumps({k: v for k, v in (registro.get("background") or {}).items() if k != "status"}, sort_keys=True),
+    )
+
+
+# Compara com a última execução equivalente e marca regressões acima do limite
+def compare_with_previous(registro, historico, limite):
+    anteriores = [h for h in historico if _chave_comparacao(h) == _chave_comparacao(registro)]
+    if not anteriores:
+        return None, []
+    anterior = anteriores[-1]
+    regressoes = []
+    for metrica in ("p50_ms", "p95_ms", "p99_ms"):
+        if anterior[metrica] and registro[metrica] > anterior[metrica] * (1 + limite):
+            regressoes.append(f"{metrica} {anterior[metrica]} -> {registro[metrica]}")
+    if anterior["throughput_rps"] and registro["throughput_rps"] < anterior["throughput_rps"] * (1 - limite):
+        regressoes.append(f"throughput_rps {anterior['throughput_rps']} -> {registro['throughput_rps']}")
+    if registro["error_rate"] > anterior["error_rate"] + 0.01:
+        regressoes.append(f"error_rate {anterior['error_rate']} -> {registro['error_rate']}")
+    return anterior, regressoes
+
+
+def print_table(registros, comparacoes):
+    cabecalho = f"{'cenário':<30}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'erros':>8}{'rss MB':>9}  comparação"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for registro, (anterior, regressoes) in zip(registros, comparacoes):
+        if anterior is None:
+            comparacao = "sem histórico"
+        elif regressoes:
+            comparacao = "REGRESSÃO: " + "; ".join(regressoes)
+        else:
+            comparacao = f"ok (vs {anterior.get('commit') or anterior['run_at']})"
+        print(
+            f"{registro['scenario']:<30}{registro['throughput_rps']:>9}{registro['p50_ms']:>10}"
+            f"{registro['p95_ms']:>10}{registro['p99_ms']:>10}{registro['error_rate']:>8}"
+            f"{str(registro['rss_mb']):>9}  {comparacao}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline dos endpoints do SYM-Gestor")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=50, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2, help="requisições de aquecimento por cenário")
+    parser.add_argument("--seed-comments", type=int, default=2000)
+    parser.add_argument("--openai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--openai-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-error-status", type=int, default=429)
+    parser.add_argument("--openai-retry-after", type=float, default=1.0, help="segundos no header retry-after")
+    parser.add_argument("--pinecone-latency-ms", type=float, default=20.0)
+    parser.add_argument("--mysql-latency-ms", type=float, default=2.0)
+    parser.add_argument("--background", choices=sorted(SCENARIOS),
+                        help="cenário mantido em carga durante as medições (ex.: sobrecarga de endpoints pesados)")
+    parser.add_argument("--background-concurrency", type=int, default=50)
+    parser.add_argument("--trace-memory", action="store_true", help="mede o pico de alocações Python (mais lento)")
+    parser.add_argument("--regression-threshold", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true", help="não grava o resultado no histórico")
+    parser.add_argument("--verbose", action="store_true", help="mostra os prints do backend durante a carga")
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    config = FakeConfig(
+        openai_latency_ms=args.openai_latency_ms,
+        openai_jitter_ms=args.openai_jitter_ms,
+        openai_error_rate=args.openai_error_rate,
+        openai_error_status=args.openai_error_status,
+        openai_retry_after=args.openai_retry_after,
+        pinecone_latency_ms=args.pinecone_latency_ms,
+        mysql_latency_ms=args.mysql_latency_ms,
+    )
+    fakes = install_fakes(config)
+    fakes.seed(args.seed_comments)
+
+    # O backend só pode ser importado depois que os substitutos estão instalados
+    saida = io.StringIO() if not args.verbose else sys.stdout
+    with contextlib.redirect_stdout(saida):
+        backend = importlib.import_module("main")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    registros = []
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        for nome in args.scenarios:
+            with contextlib.redirect_stdout(io.StringIO() if not args.verbose else sys.stdout):
+                if args.warmup:
+                    await run_scenario(client, nome, args.warmup, 1, False)
+                if args.background:
+                    parar = asyncio.Event()
+                    fundo = asyncio.create_task(
+                        background_load(client, args.background, args.background_concurrency, parar)
+                    )
+                    await asyncio.sleep(0.5)  # Deixa a sobrecarga se instalar antes de medir
+                resultado = await run_scenario(client, nome, args.requests, args.concurrency, args.trace_memory)
+                if args.background:
+                    parar.set()
+                    resultado["background"] = {
+                        "scenario": args.background,
+                        "concurrency": args.background_concurrency,
+                        "status": await fundo,
+                    }
+            registros.append(resultado)
+            print(f"[INFO] {nome}: {resultado['throughput_rps']} req/s, p95 {resultado['p95_ms']} ms", file=sys.stderr)
+
+    fakes.stop()
+
+    metadados = {
+        "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "fakes": {
+            "openai_latency_ms": config.openai_latency_ms,
+            "openai_jitter_ms": config.openai_jitter_ms,
+            "openai_error_rate": config.openai_error_rate,
+            "openai_error_status": config.openai_error_status,
+            "pinecone_latency_ms": config.pinecone_latency_ms,
+            "mysql_latency_ms": config.mysql_latency_ms,
+            "seed_comments": args.seed_comments,
+        },
+    }
+    return [{**metadados, **r} for r in registros]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    registros = asyncio.run(run(args))
+
+    historico = load_history()
+    comparacoes = [compare_with_previous(r, historico, args.regression_threshold) for r in registros]
+    print_table(registros, comparacoes)
+
+    if not args.no_save:
+        save_history(registros)
+        print(f"\n[INFO] Resultados gravados em {HISTORY_FILE}")
+
+    if args.fail_on_regression and any(regressoes for _, regressoes in comparacoes):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
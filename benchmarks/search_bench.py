@@ -0,0 +1,218 @@
+"""Benchmark da busca híbrida de comentários (/api/search) sobre um corpus sintético.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.search_bench
+    python -m benchmarks.search_bench --seed-comments 1000000 --vectors 50000 --requests 500
+    python -m benchmarks.search_bench --mysql --mysql-database sym_bench --seed-comments 2000000
+
+Sem --mysql, o MySQL é o substituto em sqlite, com o índice FULLTEXT emulado pelo FTS5: os
+números servem para comparar versões do código, não para prever a latência do MySQL. Com
+--mysql, o corpus sintético vai para a tabela comentarios_clientes do banco indicado em
+--mysql-database (mesmo servidor de MYSQL_HOST), que precisa ter o índice de
+migrations/001_comentarios_fulltext.sql. O benchmark se recusa a usar o banco da aplicação
+(MYSQL_DATABASE) e a popular uma tabela que já tem linhas, a menos que --mysql-truncate seja
+passado para esvaziá-la antes.
+
+Cenários por modo de busca: "cold" usa uma consulta diferente a cada requisição (sem cache de
+resultados nem de embeddings), "warm" repete poucas consultas (cache) e "filtered" aplica
+unidade, sentimento e período. Os resultados entram no mesmo histórico do loadtest.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import itertools
+import logging
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+import pymysql
+from dotenv import load_dotenv
+
+from benchmarks import loadtest
+from benchmarks.fakes import (
+    ASPECTOS_SINTETICOS,
+    OPINIOES_SINTETICAS,
+    PRATOS_SINTETICOS,
+    UNIDADES_PADRAO,
+    FakeConfig,
+    install_fakes,
+    synthetic_comment,
+)
+
+
+MODOS = ["hybrid", "keyword", "semantic"]
+
+
+# Consultas de 2 a 3 termos do mesmo vocabulário do corpus, em ordem aleatória e sem repetição
+def build_queries(seed=7):
+    consultas = [f"{a} {o}" for a, o in itertools.product(ASPECTOS_SINTETICOS, OPINIOES_SINTETICAS)]
+    consultas += [f"{p} {o}" for p, o in itertools.product(PRATOS_SINTETICOS, OPINIOES_SINTETICAS)]
+    consultas += [f"{a} {p} {o}" for a, p, o in
+                  itertools.product(ASPECTOS_SINTETICOS, PRATOS_SINTETICOS, OPINIOES_SINTETICAS)]
+    random.Random(seed).shuffle(consultas)
+    return consultas
+
+
+def build_scenarios(consultas, modos, hoje, repetidas=20):
+    inicio_periodo = (hoje - timedelta(days=7)).isoformat()
+    cenarios = {}
+    for modo in modos:
+        cenarios[f"search_{modo}_cold"] = (
+            lambda i, modo=modo: ("GET", "/api/search", {"params": {"q": consultas[i % len(consultas)], "mode": modo}})
+        )
+        cenarios[f"search_{modo}_warm"] = (
+            lambda i, modo=modo: ("GET", "/api/search", {"params": {"q": consultas[i % repetidas], "mode": modo}})
+        )
+        cenarios[f"search_{modo}_filtered"] = (
+            lambda i, modo=modo: ("GET", "/api/search", {"params": {
+                "q": consultas[-1 - i % len(consultas)],
+                "mode": modo,
+                "unidade": UNIDADES_PADRAO[i % len(UNIDADES_PADRAO)],
+                "sentimento": "negativo",
+                "data_inicio": inicio_periodo,
+            }})
+        )
+    return cenarios
+
+
+# Confere se o banco do benchmark é seguro para receber o corpus: não é o da aplicação, tem o
+# índice FULLTEXT e a tabela está vazia (ou pode ser esvaziada com --mysql-truncate)
+def check_mysql(database, truncate=False):
+    if not database:
+        return "--mysql exige --mysql-database com um banco só para o benchmark"
+    if database == os.getenv("MYSQL_DATABASE"):
+        return f"{database} é o banco da aplicação (MYSQL_DATABASE); use um banco separado para o benchmark"
+
+    connection = pymysql.connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=database,
+        charset="utf8mb4",
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW INDEX FROM comentarios_clientes WHERE Index_type = 'FULLTEXT'")
+            if not cursor.fetchall():
+                return "comentarios_clientes sem índice FULLTEXT; aplique migrations/001_comentarios_fulltext.sql"
+            cursor.execute("SELECT COUNT(*) FROM comentarios_clientes")
+            total = cursor.fetchone()[0]
+            if total and not truncate:
+                return (f"{database}.comentarios_clientes já tem {total} linhas; "
+                        "use --mysql-truncate para esvaziá-la antes da carga")
+            if total:
+                cursor.execute("TRUNCATE TABLE comentarios_clientes")
+                print(f"[INFO] {database}.comentarios_clientes esvaziada ({total} linhas)", file=sys.stderr)
+    finally:
+        connection.close()
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da busca híbrida de comentários")
+    parser.add_argument("--modes", nargs="+", choices=MODOS, default=MODOS)
+    parser.add_argument("--seed-comments", type=int, default=200000, help="comentários sintéticos inseridos")
+    parser.add_argument("--vectors", type=int, default=20000,
+                        help="quantos dos comentários também vão ao Pinecone local (cada vetor ocupa 6 KB)")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--openai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--pinecone-latency-ms", type=float, default=20.0)
+    parser.add_argument("--mysql-latency-ms", type=float, default=2.0)
+    parser.add_argument("--mysql", action="store_true", help="usa o MySQL real do servidor em MYSQL_HOST")
+    parser.add_argument("--mysql-database", help="banco descartável do benchmark (diferente de MYSQL_DATABASE)")
+    parser.add_argument("--mysql-truncate", action="store_true",
+                        help="esvazia comentarios_clientes do banco do benchmark antes da carga")
+    parser.add_argument("--regression-threshold", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true", help="não grava o resultado no histórico")
+    parser.add_argument("--verbose", action="store_true", help="mostra os prints do backend durante a carga")
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    config = FakeConfig(
+        openai_latency_ms=args.openai_latency_ms,
+        pinecone_latency_ms=args.pinecone_latency_ms,
+        mysql_latency_ms=args.mysql_latency_ms,
+    )
+    if args.mysql:
+        load_dotenv()  # MYSQL_DATABASE do .env identifica o banco da aplicação
+        erro = check_mysql(args.mysql_database, args.mysql_truncate)
+        if erro:
+            raise SystemExit(f"[ERROR] {erro}")
+        # A carga e o backend medido passam a usar o banco do benchmark (load_dotenv não sobrescreve)
+        os.environ["MYSQL_DATABASE"] = args.mysql_database
+    fakes = install_fakes(config, mysql=not args.mysql)
+
+    inicio = time.perf_counter()
+    fakes.seed(args.seed_comments, gerador=lambda rng, i: synthetic_comment(rng), vetores=args.vectors)
+    print(f"[INFO] Corpus sintético: {args.seed_comments} comentários ({args.vectors} vetores) "
+          f"em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    saida = io.StringIO() if not args.verbose else sys.stdout
+    with contextlib.redirect_stdout(saida):
+        backend = importlib.import_module("main")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    cenarios = build_scenarios(build_queries(), args.modes, date.today())
+    loadtest.SCENARIOS.update(cenarios)
+
+    registros = []
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        for nome in cenarios:
+            with contextlib.redirect_stdout(io.StringIO() if not args.verbose else sys.stdout):
+                if args.warmup:
+                    await loadtest.run_scenario(client, nome, args.warmup, 1, False)
+                resultado = await loadtest.run_scenario(client, nome, args.requests, args.concurrency, False)
+            registros.append(resultado)
+            print(f"[INFO] {nome}: {resultado['throughput_rps']} req/s, p95 {resultado['p95_ms']} ms", file=sys.stderr)
+
+    fakes.stop()
+
+    metadados = {
+        "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": loadtest.git_commit(),
+        "python": sys.version.split()[0],
+        "fakes": {
+            "openai_latency_ms": config.openai_latency_ms,
+            "pinecone_latency_ms": config.pinecone_latency_ms,
+            "mysql_latency_ms": None if args.mysql else config.mysql_latency_ms,
+            "mysql": "real" if args.mysql else "sqlite",
+            "seed_comments": args.seed_comments,
+            "vectors": args.vectors,
+        },
+    }
+    return [{**metadados, **r} for r in registros]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    registros = asyncio.run(run(args))
+
+    historico = loadtest.load_history()
+    comparacoes = [loadtest.compare_with_previous(r, historico, args.regression_threshold) for r in registros]
+    loadtest.print_table(registros, comparacoes)
+
+    if not args.no_save:
+        loadtest.save_history(registros)
+        print(f"\n[INFO] Resultados gravados em {loadtest.HISTORY_FILE}")
+
+    if args.fail_on_regression and any(regressoes for _, regressoes in comparacoes):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
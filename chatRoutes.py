@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
-from langchain_openai import ChatOpenAI
+from fastapi.concurrency import run_in_threadpool
 from langchain.schema import HumanMessage
 from langchain.agents import initialize_agent
 from langchain.tools import StructuredTool
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
+from llmScheduler import ScheduledChatOpenAI, SchedulerTimeoutError, PRIORIDADE_INTERATIVA
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -14,8 +15,8 @@ load_dotenv()
 # Configura o router
 router = APIRouter()
 
-# Inicializa o modelo GPT
-chat_model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
+# Inicializa o modelo GPT (chamadas com prioridade interativa no agendador compartilhado)
+chat_model = ScheduledChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, priority=PRIORIDADE_INTERATIVA)
 
 # Função para responder com base no input
 def chat_response(user_message: str) -> str:
@@ -28,6 +29,8 @@ def chat_response(user_message: str) -> str:
         # Gera a resposta
         response = chat_model.invoke(messages)
         return response.content.strip()
+    except SchedulerTimeoutError:
+        raise  # Tratado em chat_agent (503 com Retry-After)
     except Exception as e:
         print(f"Erro no agente do chat: {str(e)}")
         return "Ocorreu um erro ao processar a mensagem. Tente novamente."
@@ -42,9 +45,13 @@ async def chat_agent(request: ChatInput):
     try:
         # Processa a mensagem do usuário
         user_message = request.message
-        agent_reply = chat_response(user_message)
+        agent_reply = await run_in_threadpool(chat_response, user_message)
 
         # Retorna a resposta ao frontend
         return JSONResponse(content={"reply": agent_reply})
+    except SchedulerTimeoutError as e:
+        print(f"OpenAI indisponível para o chat: {str(e)}")
+        headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else {}
+        return JSONResponse(content={"error": str(e)}, status_code=503, headers=headers)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
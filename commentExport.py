@@ -0,0 +1,223 @@
+"""Exportação em massa da tabela comentarios_clientes (CSV, JSONL ou Parquet).
+
+Uso pela linha de comando (a partir da raiz do repositório):
+
+    python commentExport.py --format parquet --output comentarios.parquet
+    python commentExport.py --format csv --gzip --output comentarios.csv.gz --unidade Centro
+    python commentExport.py --format jsonl --output - --data-inicio 2024-01-01 --sentimento negativo
+
+A leitura usa cursor sem buffer (SSCursor) em blocos paginados por chave (id),
+então a memória fica constante independentemente do tamanho da tabela.
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time as relogio
+import zlib
+from datetime import date, datetime
+
+import orjson
+import pymysql
+from dotenv import load_dotenv
+
+from commentQueries import MYSQL_SESSION_UTC, build_filters
+
+load_dotenv()  # Carregar variáveis de ambiente
+
+
+COLUNAS = ["id", "comentario", "sentimento", "nome_cliente", "email", "unidade", "data_hora"]
+
+# Linhas por consulta paginada e por lote lido do cursor sem buffer
+CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "50000"))
+FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+
+
+# Conexão com cursor sem buffer: as linhas chegam do servidor à medida que são lidas
+def get_mysql_connection():
+    return pymysql.connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE"),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.SSCursor,
+        init_command=MYSQL_SESSION_UTC  # data_hora exportado e filtrado em UTC
+    )
+
+
+# Lê a tabela em lotes de tuplas, paginando por id (keyset) para nunca manter uma consulta longa aberta
+def iter_comment_batches(unidade=None, sentimento=None, data_inicio=None, data_fim=None,
+                         chunk_size=CHUNK_SIZE, fetch_size=FETCH_SIZE):
+    condicoes, parametros = build_filters(unidade, sentimento, data_inicio, data_fim)
+    where = " AND ".join(["id > %s"] + condicoes)
+    query = f"""
+        SELECT {", ".join(COLUNAS)}
+        FROM comentarios_clientes
+        WHERE {where}
+        ORDER BY id
+        LIMIT {int(chunk_size)}
+    """
+
+    connection = get_mysql_connection()
+    try:
+        ultimo_id = 0
+        while True:
+            lidas = 0
+            with connection.cursor(pymysql.cursors.SSCursor) as cursor:
+                cursor.execute(query, [ultimo_id] + parametros)
+                while True:
+                    lote = cursor.fetchmany(fetch_size)
+                    if not lote:
+                        break
+                    lidas += len(lote)
+                    ultimo_id = lote[-1][0]
+                    yield lote
+            if lidas < chunk_size:
+                break
+    finally:
+        connection.close()
+
+
+############################################## FORMATOS ##############################################
+
+
+def _valor_csv(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    return valor
+
+
+# Converte os lotes em bytes CSV (com cabeçalho)
+def iter_csv(lotes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUNAS)
+    yield buffer.getvalue().encode("utf-8")
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_valor_csv(v) for v in linha] for linha in lote)
+        yield buffer.getvalue().encode("utf-8")
+
+
+# Converte os lotes em bytes JSON Lines (um objeto por comentário)
+def iter_jsonl(lotes):
+    for lote in lotes:
+        yield b"".join(orjson.dumps(dict(zip(COLUNAS, linha))) + b"\n" for linha in lote)
+
+
+# Comprime um fluxo de bytes em gzip sem acumulá-lo em memória
+def iter_gzip(partes, level=5):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for parte in partes:
+        dados = compressor.compress(parte)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+FORMATOS_TEXTO = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "jsonl": (iter_jsonl, "application/x-ndjson"),
+}
+
+
+# Grava os lotes em Parquet, um row group por bloco de linhas (requer pyarrow)
+def write_parquet(lotes, destino, row_group_size=CHUNK_SIZE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("comentario", pa.string()),
+        ("sentimento", pa.string()),
+        ("nome_cliente", pa.string()),
+        ("email", pa.string()),
+        ("unidade", pa.string()),
+        ("data_hora", pa.timestamp("s")),
+    ])
+
+    total = 0
+    pendentes = []
+    with pq.ParquetWriter(destino, schema, compression="zstd") as writer:
+        def gravar():
+            colunas = list(zip(*[linha for lote in pendentes for linha in lote]))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, schema)],
+                schema=schema,
+            ))
+            pendentes.clear()
+
+        linhas_pendentes = 0
+        for lote in lotes:
+            pendentes.append(lote)
+            linhas_pendentes += len(lote)
+            total += len(lote)
+            if linhas_pendentes >= row_group_size:
+                gravar()
+                linhas_pendentes = 0
+        if pendentes:
+            gravar()
+    return total
+
+
+############################################## LINHA DE COMANDO ##############################################
+
+
+def _contar(lotes, contador):
+    for lote in lotes:
+        contador[0] += len(lote)
+        yield lote
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta a tabela comentarios_clientes")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="csv")
+    parser.add_argument("--output", required=True, help="arquivo de destino ('-' para a saída padrão em CSV/JSONL)")
+    parser.add_argument("--gzip", action="store_true", help="comprime a saída CSV/JSONL em gzip")
+    parser.add_argument("--unidade")
+    parser.add_argument("--sentimento")
+    parser.add_argument("--data-inicio", type=date.fromisoformat)
+    parser.add_argument("--data-fim", type=date.fromisoformat)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    contador = [0]
+    inicio = relogio.perf_counter()
+    lotes = _contar(
+        iter_comment_batches(args.unidade, args.sentimento, args.data_inicio, args.data_fim,
+                             chunk_size=args.chunk_size),
+        contador,
+    )
+
+    if args.format == "parquet":
+        if args.output == "-":
+            print("[ERROR] Parquet precisa de um arquivo de destino.", file=sys.stderr)
+            return 2
+        write_parquet(lotes, args.output, row_group_size=args.chunk_size)
+    else:
+        partes = FORMATOS_TEXTO[args.format][0](lotes)
+        if args.gzip:
+            partes = iter_gzip(partes)
+        destino = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            for parte in partes:
+                destino.write(parte)
+        finally:
+            if destino is not sys.stdout.buffer:
+                destino.close()
+
+    duracao = relogio.perf_counter() - inicio
+    print(f"[INFO] {contador[0]} comentários exportados em {duracao:.1f}s "
+          f"({contador[0] / duracao if duracao else 0:.0f} linhas/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Consultas compartilhadas sobre a tabela comentarios_clientes."""
+
+import os
+import re
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+load_dotenv()  # Carregar variáveis de ambiente
+
+
+# Fuso em que data_inicio/data_fim são interpretados (ex.: America/Sao_Paulo); o padrão é UTC.
+# O resumo do MySQL e os filtros do Pinecone usam os mesmos limites, convertidos para UTC.
+APP_TIMEZONE = ZoneInfo(os.getenv("APP_TIMEZONE")) if os.getenv("APP_TIMEZONE") else timezone.utc
+
+# Sessão do MySQL em UTC (init_command do pymysql.connect): data_hora (TIMESTAMP) é lido e
+# comparado em UTC, como o timestamp_epoch dos vetores, seja qual for o fuso do servidor
+MYSQL_SESSION_UTC = "SET time_zone = '+00:00'"
+
+
+# Stopwords padrão do InnoDB (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD), que o índice de
+# migrations/001_comentarios_fulltext.sql não indexa. Um termo obrigatório (+termo) que seja
+# stopword faz o MATCH não devolver nenhuma linha. Se o servidor usar outra lista
+# (innodb_ft_server_stopword_table), atualize aqui também.
+STOPWORDS_FULLTEXT = frozenset([
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how",
+    "i", "in", "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "who", "will", "with", "und", "www",
+])
+
+# innodb_ft_min_token_size: termos mais curtos não são indexados
+MIN_TOKEN_FULLTEXT = 3
+
+
+# Termos da consulta que existem no índice FULLTEXT (sem palavras curtas nem stopwords)
+def fulltext_terms(query_text):
+    return [t for t in re.findall(r"\w+", query_text.lower())
+            if len(t) >= MIN_TOKEN_FULLTEXT and t not in STOPWORDS_FULLTEXT]
+
+
+# Limites [início, fim) do período em UTC: meia-noite de data_inicio e do dia seguinte a data_fim no APP_TIMEZONE
+def date_bounds(data_inicio=None, data_fim=None):
+    def meia_noite(dia):
+        return datetime.combine(dia, time.min, tzinfo=APP_TIMEZONE).astimezone(timezone.utc)
+    inicio = meia_noite(data_inicio) if data_inicio else None
+    fim = meia_noite(data_fim + timedelta(days=1)) if data_fim else None
+    return inicio, fim
+
+
+# Monta as condições do WHERE a partir dos filtros opcionais (conexão com MYSQL_SESSION_UTC)
+def build_filters(unidade=None, sentimento=None, data_inicio=None, data_fim=None):
+    condicoes, parametros = [], []
+    if unidade:
+        condicoes.append("unidade = %s")
+        parametros.append(unidade)
+    if sentimento:
+        condicoes.append("sentimento = %s")
+        parametros.append(sentimento)
+    inicio, fim = date_bounds(data_inicio, data_fim)
+    if inicio:
+        condicoes.append("data_hora >= %s")
+        parametros.append(inicio.replace(tzinfo=None))
+    if fim:
+        condicoes.append("data_hora < %s")
+        parametros.append(fim.replace(tzinfo=None))
+    return condicoes, parametros
+
+
+# Monta o filtro de metadata do Pinecone; a busca fica restrita aos vetores da unidade e do período
+def build_pinecone_filter(unidade=None, data_inicio=None, data_fim=None, sentimento=None):
+    filtro = {}
+    if unidade:
+        filtro["unidade"] = {"$eq": unidade}
+    if sentimento:
+        filtro["sentimento"] = {"$eq": sentimento}
+    inicio, fim = date_bounds(data_inicio, data_fim)
+    intervalo = {}
+    if inicio:
+        intervalo["$gte"] = int(inicio.timestamp())
+    if fim:
+        intervalo["$lt"] = int(fim.timestamp())
+    if intervalo:
+        filtro["timestamp_epoch"] = intervalo
+    return filtro or None
@@ -0,0 +1,61 @@
+import os
+import re
+from dotenv import load_dotenv
+import numpy as np
+# Importando e renomeando o Pinecone para gerenciamento do índice
+from pinecone import Pinecone as PineconeClient, ServerlessSpec
+
+from llmScheduler import ScheduledOpenAIEmbeddings, PRIORIDADE_RELATORIO, PRIORIDADE_INTERATIVA
+from lruCache import LRUCache
+
+
+load_dotenv()  # Carregar variáveis de ambiente
+
+# Quantidade de embeddings de consulta mantidos em cache (relatórios e busca; ~6 KB cada em float32)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+
+pc = PineconeClient(
+    api_key=os.getenv("PINECONE_API_KEY"),
+    environment="us-east-1"  # Substitua pela região configurada no Pinecone
+)
+
+index_name = "sym-comentarios"
+
+# Verifica se o índice existe
+if index_name not in [i.name for i in pc.list_indexes()]:
+    pc.create_index(
+        name=index_name,
+        dimension=1536,
+        metric="cosine",
+        spec=ServerlessSpec(cloud="aws", region="us-east-1")
+    )
+
+# Conecta ao índice
+index = pc.Index(index_name)
+
+embeddings = ScheduledOpenAIEmbeddings(
+    model="text-embedding-ada-002",
+    api_key=os.getenv("OPENAI_API_KEY"),
+    priority=PRIORIDADE_RELATORIO
+)
+
+# Cliente por prioridade: a busca (interativa) e os relatórios compartilham o cache abaixo,
+# mas cada um entra na fila do agendador com a sua prioridade
+_clientes_embedding = {
+    PRIORIDADE_RELATORIO: embeddings,
+    PRIORIDADE_INTERATIVA: embeddings.model_copy(update={"priority": PRIORIDADE_INTERATIVA}),
+}
+
+# Embeddings de consulta em float32 (1536 x 4 bytes), e não como tupla de floats do Python (~48 KB cada)
+embedding_cache = LRUCache(EMBEDDING_CACHE_SIZE)
+
+def embed_query(query_text, priority=PRIORIDADE_RELATORIO):
+    # Normaliza espaços para que variações triviais reaproveitem o cache
+    chave = re.sub(r"\s+", " ", query_text).strip()
+    vetor = embedding_cache.get(chave)
+    if vetor is None:
+        cliente = _clientes_embedding.get(priority, embeddings)
+        vetor = np.asarray(cliente.embed_query(chave), dtype=np.float32)
+        vetor.setflags(write=False)
+        embedding_cache.set(chave, vetor)
+    return vetor.tolist()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from datetime import date, datetime, timezone
+
+
+# Hub em memória dos deltas do dashboard. Cada processo tem o seu hub: com vários
+# workers, cada um só enxerga as alterações que ele mesmo gravou.
+class DashboardEventHub:
+    def __init__(self, buffer_size=5000, queue_size=1000):
+        # O epoch muda a cada reinício, invalidando cursores de execuções anteriores
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        # Trava entre gravações (commit + publish) e snapshots (cursor + início da leitura no MySQL):
+        # sem ela, um commit entre a leitura do cursor e a consulta seria contado duas vezes
+        self.write_lock = threading.Lock()
+
+    def cursor(self) -> str:
+        with self._lock:
+            return f"{self.epoch}-{self._seq}"
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    # Converte o cursor "epoch-seq" em número de sequência; None se for de outra execução
+    def _parse_cursor(self, cursor):
+        epoch, _, seq = (cursor or "").rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    # Registra um delta; pode ser chamado de qualquer thread
+    def publish(self, changes, record_id=None):
+        if not changes:
+            return
+        with self._lock:
+            self._seq += 1
+            evento = {
+                "cursor": f"{self.epoch}-{self._seq}",
+                "seq": self._seq,
+                "record_id": record_id,
+                "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "changes": changes,
+            }
+            self._buffer.append(evento)
+            inscritos = list(self._subscribers)
+
+        for loop, fila in inscritos:
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, evento)
+            except RuntimeError:
+                pass  # Event loop já encerrado; a inscrição será removida pelo próprio stream
+
+    @staticmethod
+    def _entregar(fila, evento):
+        try:
+            fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: em vez de crescer sem limite, pede que ele recarregue tudo
+            fila.overflow = True
+
+    # Inscreve o chamador (dentro do event loop) e devolve a fila e os eventos pendentes desde `since`.
+    # Os pendentes são None quando o cursor não pode ser atendido e o cliente precisa recarregar.
+    def subscribe(self, since=None):
+        fila = asyncio.Queue(maxsize=self._queue_size)
+        fila.overflow = False
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.add((loop, fila))
+            if since is None:
+                return fila, []
+            seq = self._parse_cursor(since)
+            mais_antigo = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+            if seq is None or seq > self._seq or seq < mais_antigo - 1:
+                return fila, None
+            return fila, [e for e in self._buffer if e["seq"] > seq]
+
+    def unsubscribe(self, fila):
+        with self._lock:
+            self._subscribers = {(l, f) for l, f in self._subscribers if f is not fila}
+
+
+def _formatar_data(valor):
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _linha(estado, delta):
+    return {
+        "unidade": estado.get("unidade"),
+        "sentimento": estado.get("sentimento"),
+        "data": _formatar_data(estado.get("data")),
+        "delta": delta,
+    }
+
+
+# Publica a mudança de um comentário como deltas (unidade, sentimento, dia, ±1).
+# `antes`/`depois` são linhas com unidade, sentimento e data (None quando o comentário não existia).
+def publish_comment_change(antes, depois, record_id=None):
+    changes = []
+    if antes and depois and _linha(antes, 1) == _linha(depois, 1):
+        return
+    if antes:
+        changes.append(_linha(antes, -1))
+    if depois:
+        changes.append(_linha(depois, 1))
+    hub.publish(changes, record_id=record_id)
+
+
+def format_sse(evento, nome="delta") -> str:
+    return f"id: {evento['cursor']}\nevent: {nome}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+# Instância única usada pelos endpoints de gravação e pelo stream do dashboard
+hub = DashboardEventHub()
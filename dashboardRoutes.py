@@ -1,9 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request
 import pymysql
 import os
+import asyncio
 from dotenv import load_dotenv
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import date
+from typing import Optional
+
+from dashboardEvents import hub, format_sse
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -22,11 +26,34 @@ def get_mysql_connection():
 # Criação do router
 router = APIRouter()
 
+# Intervalo entre pings do stream, para proxies não encerrarem conexões ociosas
+SSE_PING_SECONDS = 15
+
+# Abre a conexão com um snapshot consistente do MySQL e lê o cursor do hub como um só passo.
+# As gravações confirmam e publicam sob a mesma trava (hub.write_lock), então a consulta
+# reflete exatamente os deltas até o cursor: nenhum é perdido nem contado duas vezes.
+# (O snapshot vale para a transação inteira no isolamento padrão do InnoDB, REPEATABLE READ.)
+def open_snapshot():
+    connection = get_mysql_connection()
+    try:
+        with hub.write_lock:
+            with connection.cursor() as cursor:
+                cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cursor_atual = hub.cursor()
+    except Exception:
+        connection.close()
+        raise
+    return connection, cursor_atual
+
+# Cabeçalho com o cursor do hub correspondente ao snapshot da consulta
+def cursor_headers(cursor):
+    return {"X-Dashboard-Cursor": cursor}
+
 # Endpoint para buscar número de comentários por unidade
 @router.get("/dashboard/comments-by-unit")
 async def comments_by_unit():
     try:
-        connection = get_mysql_connection()
+        connection, cursor_atual = open_snapshot()
         with connection.cursor() as cursor:
             query = """
                 SELECT unidade, COUNT(*) AS total
@@ -36,7 +63,7 @@ async def comments_by_unit():
             cursor.execute(query)
             results = cursor.fetchall()
         connection.close()
-        return JSONResponse(content=results)
+        return JSONResponse(content=results, headers=cursor_headers(cursor_atual))
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -44,7 +71,7 @@ async def comments_by_unit():
 @router.get("/dashboard/sentiment-by-unit")
 async def sentiment_by_unit():
     try:
-        connection = get_mysql_connection()
+        connection, cursor_atual = open_snapshot()
         with connection.cursor() as cursor:
             query = """
                 SELECT unidade, sentimento, COUNT(*) AS total
@@ -54,7 +81,7 @@ async def sentiment_by_unit():
             cursor.execute(query)
             results = cursor.fetchall()
         connection.close()
-        return JSONResponse(content=results)
+        return JSONResponse(content=results, headers=cursor_headers(cursor_atual))
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
@@ -62,7 +89,7 @@ async def sentiment_by_unit():
 @router.get("/dashboard/sentiment-trend")
 async def sentiment_trend():
     try:
-        connection = get_mysql_connection()
+        connection, cursor_atual = open_snapshot()
         with connection.cursor() as cursor:
             query = """
                 SELECT DATE(data_hora) AS data, sentimento, COUNT(*) AS total
@@ -79,6 +106,46 @@ async def sentiment_trend():
                     row['data'] = row['data'].isoformat()  # Converte para string ISO
 
         connection.close()
-        return JSONResponse(content=results)
+        return JSONResponse(content=results, headers=cursor_headers(cursor_atual))
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
+
+# Stream (SSE) com os deltas do dashboard: cada evento traz linhas (unidade, sentimento, data, ±1)
+# que atualizam as três visões sem refazer as consultas. `since` (ou Last-Event-ID na
+# reconexão) reenvia o que foi perdido; se o cursor expirou, envia `reset` para recarregar.
+@router.get("/dashboard/stream")
+async def dashboard_stream(request: Request, since: Optional[str] = Query(None)):
+    since = since or request.headers.get("last-event-id")
+    fila, pendentes = hub.subscribe(since)
+
+    async def eventos():
+        try:
+            yield "retry: 3000\n\n"
+            if pendentes is None:
+                yield format_sse({"cursor": hub.cursor()}, "reset")
+            else:
+                for evento in pendentes:
+                    yield format_sse(evento)
+
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=SSE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if fila.overflow:
+                    # Cliente ficou para trás: descarta a fila e pede recarga completa
+                    while not fila.empty():
+                        fila.get_nowait()
+                    fila.overflow = False
+                    yield format_sse({"cursor": hub.cursor()}, "reset")
+                    continue
+                yield format_sse(evento)
+        finally:
+            hub.unsubscribe(fila)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
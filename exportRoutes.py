@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+import itertools
+from datetime import date
+from typing import Literal, Optional
+
+from commentExport import FORMATOS_TEXTO, iter_comment_batches, iter_gzip
+
+# Criação do router
+router = APIRouter()
+
+# Endpoint de exportação em streaming da tabela de comentários (CSV ou JSONL, gzip quando aceito).
+# O gerador é síncrono: o Starlette o consome em thread, sem bloquear o event loop.
+# A conexão e a primeira página são abertas antes da resposta: depois que o 200 sai, uma falha
+# do MySQL só poderia cortar o corpo.
+@router.get("/export/comentarios")
+async def export_comentarios(
+    request: Request,
+    format: Literal["csv", "jsonl"] = Query("csv"),
+    unidade: Optional[str] = Query(None),
+    sentimento: Optional[str] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+):
+    serializar, media_type = FORMATOS_TEXTO[format]
+    lotes = iter_comment_batches(unidade, sentimento, data_inicio, data_fim)
+    try:
+        primeiro = await run_in_threadpool(next, lotes, None)
+    except Exception as e:
+        print(f"[ERROR] Erro ao iniciar a exportação de comentários: {str(e)}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    if primeiro is not None:
+        lotes = itertools.chain([primeiro], lotes)
+    partes = serializar(lotes)
+
+    headers = {"Content-Disposition": f'attachment; filename="comentarios_clientes.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        partes = iter_gzip(partes)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(partes, media_type=media_type, headers=headers)
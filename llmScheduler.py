@@ -0,0 +1,392 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import List, Optional
+
+import openai
+import tiktoken
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+
+# Prioridades: quanto menor o número, antes a chamada é atendida
+PRIORIDADE_INTERATIVA = 0   # chat, transcrição e análise de sentimento (usuário aguardando)
+PRIORIDADE_RELATORIO = 1    # geração de relatórios
+PRIORIDADE_LOTE = 2         # reprocessamentos e jobs em massa
+
+NOMES_PRIORIDADE = {
+    PRIORIDADE_INTERATIVA: "interativa",
+    PRIORIDADE_RELATORIO: "relatorio",
+    PRIORIDADE_LOTE: "lote",
+}
+
+# Limites (requisições/min, tokens/min) por modelo; None desativa o balde de tokens
+LIMITES_PADRAO = {
+    "gpt-3.5-turbo": (3500, 200000),
+    "gpt-4-turbo": (500, 30000),
+    "text-embedding-ada-002": (3000, 1000000),
+    "whisper-1": (50, None),
+}
+
+# Reserva de tokens de resposta quando a chamada não define max_tokens
+RESERVA_COMPLETION = 512
+
+
+# Erro levantado quando a chamada não consegue ser atendida dentro do prazo
+class SchedulerTimeoutError(TimeoutError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+############################################## ESTIMATIVA DE TOKENS ##############################################
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+# Conta tokens com o tiktoken; sem as codificações (ambiente offline) usa ~4 caracteres por token
+def estimate_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+############################################## BALDES DE TOKENS ##############################################
+
+
+class TokenBucket:
+    def __init__(self, limite_por_minuto: float):
+        self.capacidade = float(limite_por_minuto)
+        self.taxa = self.capacidade / 60.0
+        self.nivel = self.capacidade
+        self.atualizado = time.monotonic()
+
+    def _reabastecer(self, agora):
+        self.nivel = min(self.capacidade, self.nivel + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    # Segundos até haver saldo para `custo` (custos maiores que a capacidade esperam o balde cheio)
+    def tempo_ate(self, custo, agora):
+        self._reabastecer(agora)
+        custo = min(custo, self.capacidade)
+        if self.nivel >= custo:
+            return 0.0
+        return (custo - self.nivel) / self.taxa
+
+    def consumir(self, custo, agora):
+        self._reabastecer(agora)
+        self.nivel -= min(custo, self.capacidade)
+
+    def devolver(self, quantidade):
+        self.nivel = min(self.capacidade, self.nivel + quantidade)
+
+
+############################################## AGENDADOR ##############################################
+
+
+class _Pedido:
+    __slots__ = ("prioridade", "ordem", "modelo", "tokens", "chegada", "liberado")
+
+    def __init__(self, prioridade, ordem, modelo, tokens):
+        self.prioridade = prioridade
+        self.ordem = ordem
+        self.modelo = modelo
+        self.tokens = tokens
+        self.chegada = time.monotonic()
+        self.liberado = False
+
+    def __lt__(self, outro):
+        return (self.prioridade, self.ordem) < (outro.prioridade, outro.ordem)
+
+
+class LLMScheduler:
+    def __init__(self, limites=None, max_concurrent=16, default_timeout=60.0, max_retries=4,
+                 backoff_base=1.0, backoff_max=30.0):
+        self.limites = dict(LIMITES_PADRAO if limites is None else limites)
+        self.max_concurrent = max_concurrent
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._cond = threading.Condition()
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._em_execucao = 0
+        self._baldes_requisicoes = {}
+        self._baldes_tokens = {}
+        self._pausado_ate = {}
+
+        self._esperas = {p: deque(maxlen=1000) for p in NOMES_PRIORIDADE}
+        self._contadores = {
+            "calls": 0, "completed": 0, "failed": 0, "retries": 0,
+            "rate_limited": 0, "timeouts": 0,
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "16")),
+            default_timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        )
+
+    def _baldes(self, modelo):
+        if modelo not in self._baldes_requisicoes:
+            rpm, tpm = self.limites.get(modelo, (int(os.getenv("OPENAI_RPM_LIMIT", "500")),
+                                                 int(os.getenv("OPENAI_TPM_LIMIT", "30000"))))
+            self._baldes_requisicoes[modelo] = TokenBucket(rpm)
+            self._baldes_tokens[modelo] = TokenBucket(tpm) if tpm else None
+        return self._baldes_requisicoes[modelo], self._baldes_tokens[modelo]
+
+    # Segundos até o modelo do pedido poder receber mais uma chamada
+    def _tempo_ate_liberar(self, pedido, agora):
+        requisicoes, tokens = self._baldes(pedido.modelo)
+        espera = max(
+            self._pausado_ate.get(pedido.modelo, 0.0) - agora,
+            requisicoes.tempo_ate(1, agora),
+            tokens.tempo_ate(pedido.tokens, agora) if tokens else 0.0,
+        )
+        return max(espera, 0.0)
+
+    # Libera, por ordem de prioridade, todos os pedidos que cabem nos limites agora.
+    # Só o primeiro pedido de cada modelo pode ser liberado, preservando a ordem da fila.
+    # Devolve o tempo até o próximo pedido poder ser liberado (None se depender de uma vaga)
+    def _despachar(self, agora):
+        menor_espera = None
+        while self._fila and self._em_execucao < self.max_concurrent:
+            escolhido = None
+            vistos = set()
+            for pedido in sorted(self._fila):
+                if pedido.modelo in vistos:
+                    continue
+                vistos.add(pedido.modelo)
+                espera = self._tempo_ate_liberar(pedido, agora)
+                if espera <= 0:
+                    escolhido = pedido
+                    break
+                menor_espera = espera if menor_espera is None else min(menor_espera, espera)
+            if escolhido is None:
+                return menor_espera
+
+            self._fila.remove(escolhido)
+            heapq.heapify(self._fila)
+            requisicoes, tokens = self._baldes(escolhido.modelo)
+            requisicoes.consumir(1, agora)
+            if tokens:
+                tokens.consumir(escolhido.tokens, agora)
+            self._em_execucao += 1
+            self._esperas.setdefault(escolhido.prioridade, deque(maxlen=1000)).append(agora - escolhido.chegada)
+            escolhido.liberado = True
+            self._cond.notify_all()
+        return None
+
+    def _adquirir(self, modelo, prioridade, tokens, prazo):
+        with self._cond:
+            pedido = _Pedido(prioridade, next(self._sequencia), modelo, tokens)
+            heapq.heappush(self._fila, pedido)
+            try:
+                while True:
+                    agora = time.monotonic()
+                    espera = self._despachar(agora)
+                    if pedido.liberado:
+                        return
+                    restante = prazo - agora
+                    if restante <= 0:
+                        self._contadores["timeouts"] += 1
+                        raise SchedulerTimeoutError(
+                            f"Chamada ao modelo {modelo} excedeu o prazo aguardando na fila.",
+                            retry_after=espera,
+                        )
+                    self._cond.wait(timeout=min(restante, espera) if espera else restante)
+            except BaseException:
+                if pedido in self._fila:
+                    self._fila.remove(pedido)
+                    heapq.heapify(self._fila)
+                elif pedido.liberado:
+                    self._em_execucao -= 1
+                self._cond.notify_all()
+                raise
+
+    def _liberar(self, modelo, tokens_estimados, tokens_reais):
+        with self._cond:
+            self._em_execucao -= 1
+            # Devolve ao balde o que foi reservado a mais do que o uso real
+            _, baldes_tokens = self._baldes(modelo)
+            if baldes_tokens and tokens_reais is not None and tokens_reais < tokens_estimados:
+                baldes_tokens.devolver(tokens_estimados - tokens_reais)
+            self._cond.notify_all()
+
+    # Pausa todas as chamadas do modelo (o limite da OpenAI é compartilhado pelo processo)
+    def _pausar(self, modelo, segundos):
+        with self._cond:
+            self._pausado_ate[modelo] = max(self._pausado_ate.get(modelo, 0.0), time.monotonic() + segundos)
+
+    def _espera_retry(self, erro, tentativa):
+        resposta = getattr(erro, "response", None)
+        if resposta is not None:
+            try:
+                if "retry-after-ms" in resposta.headers:
+                    return float(resposta.headers["retry-after-ms"]) / 1000
+                if "retry-after" in resposta.headers:
+                    return float(resposta.headers["retry-after"])
+            except ValueError:
+                pass
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** tentativa)
+        return backoff * random.uniform(0.5, 1.0)
+
+    # Executa `fn(timeout)` respeitando fila, limites e retries; `timeout` é o tempo restante do prazo
+    def call(self, fn, model, priority=PRIORIDADE_INTERATIVA, tokens=0, timeout=None, usage=None):
+        prazo = time.monotonic() + (timeout or self.default_timeout)
+        with self._cond:
+            self._contadores["calls"] += 1
+
+        tentativa = 0
+        while True:
+            self._adquirir(model, priority, tokens, prazo)
+            tokens_reais = None
+            try:
+                resultado = fn(max(prazo - time.monotonic(), 0.001))
+                tokens_reais = usage(resultado) if usage else None
+                with self._cond:
+                    self._contadores["completed"] += 1
+                return resultado
+            except (openai.RateLimitError, openai.APITimeoutError,
+                    openai.APIConnectionError, openai.InternalServerError) as e:
+                espera = self._espera_retry(e, tentativa)
+                if isinstance(e, openai.RateLimitError):
+                    with self._cond:
+                        self._contadores["rate_limited"] += 1
+                    self._pausar(model, espera)
+                if tentativa >= self.max_retries or time.monotonic() + espera >= prazo:
+                    with self._cond:
+                        self._contadores["failed"] += 1
+                    if isinstance(e, openai.RateLimitError):
+                        raise SchedulerTimeoutError(
+                            f"Limite de requisições do modelo {model} excedido.", retry_after=espera
+                        ) from e
+                    raise
+                with self._cond:
+                    self._contadores["retries"] += 1
+                if not isinstance(e, openai.RateLimitError):
+                    time.sleep(espera)
+                tentativa += 1
+            except Exception:
+                with self._cond:
+                    self._contadores["failed"] += 1
+                raise
+            finally:
+                self._liberar(model, tokens, tokens_reais)
+
+    # Retrato das métricas da fila para o endpoint de métricas
+    def metrics(self):
+        with self._cond:
+            agora = time.monotonic()
+            profundidade = {nome: 0 for nome in NOMES_PRIORIDADE.values()}
+            for pedido in self._fila:
+                profundidade[NOMES_PRIORIDADE.get(pedido.prioridade, str(pedido.prioridade))] += 1
+
+            esperas = {}
+            for prioridade, valores in self._esperas.items():
+                ordenados = sorted(valores)
+                esperas[NOMES_PRIORIDADE.get(prioridade, str(prioridade))] = {
+                    "count": len(ordenados),
+                    "avg_ms": round(sum(ordenados) / len(ordenados) * 1000, 2) if ordenados else 0.0,
+                    "p50_ms": round(ordenados[len(ordenados) // 2] * 1000, 2) if ordenados else 0.0,
+                    "p95_ms": round(ordenados[int(len(ordenados) * 0.95)] * 1000, 2) if ordenados else 0.0,
+                    "max_ms": round(ordenados[-1] * 1000, 2) if ordenados else 0.0,
+                }
+
+            modelos = {}
+            for modelo, requisicoes in self._baldes_requisicoes.items():
+                tokens = self._baldes_tokens[modelo]
+                requisicoes._reabastecer(agora)
+                if tokens:
+                    tokens._reabastecer(agora)
+                modelos[modelo] = {
+                    "requests_available": round(requisicoes.nivel, 1),
+                    "tokens_available": round(tokens.nivel, 1) if tokens else None,
+                    "paused_for_s": round(max(self._pausado_ate.get(modelo, 0.0) - agora, 0.0), 3),
+                }
+
+            return {
+                "queue_depth": profundidade,
+                "queue_depth_total": len(self._fila),
+                "in_flight": self._em_execucao,
+                "max_concurrent": self.max_concurrent,
+                "wait_time": esperas,
+                "models": modelos,
+                **self._contadores,
+            }
+
+
+# Instância única compartilhada por todos os módulos do backend
+scheduler = LLMScheduler.from_env()
+
+
+############################################## MODELOS LANGCHAIN AGENDADOS ##############################################
+
+
+def _tokens_da_resposta(resultado):
+    uso = (resultado.llm_output or {}).get("token_usage") or {}
+    return uso.get("total_tokens")
+
+
+# ChatOpenAI cujas chamadas passam pelo agendador (os retries ficam a cargo dele)
+class ScheduledChatOpenAI(ChatOpenAI):
+    priority: int = PRIORIDADE_INTERATIVA
+    max_retries: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = sum(estimate_tokens(str(m.content), self.model_name) + 4 for m in messages)
+        tokens += self.max_tokens or RESERVA_COMPLETION
+        return scheduler.call(
+            lambda timeout: super(ScheduledChatOpenAI, self)._generate(
+                messages, stop=stop, run_manager=run_manager, timeout=timeout, **kwargs
+            ),
+            model=self.model_name,
+            priority=self.priority,
+            tokens=tokens,
+            usage=_tokens_da_resposta,
+        )
+
+
+# OpenAIEmbeddings cujas chamadas passam pelo agendador
+class ScheduledOpenAIEmbeddings(OpenAIEmbeddings):
+    priority: int = PRIORIDADE_INTERATIVA
+    max_retries: int = 0
+
+    def embed_documents(self, texts: List[str], chunk_size: Optional[int] = 0) -> List[List[float]]:
+        tokens = sum(estimate_tokens(t, self.model) for t in texts)
+
+        # O prazo restante vai em cada requisição (client.create(timeout=...)); a cópia evita
+        # alterar a instância compartilhada entre threads
+        def chamar(timeout):
+            copia = self.model_copy(update={"model_kwargs": {**self.model_kwargs, "timeout": timeout}})
+            return OpenAIEmbeddings.embed_documents(copia, texts, chunk_size)
+
+        return scheduler.call(
+            chamar,
+            model=self.model,
+            priority=self.priority,
+            tokens=tokens,
+        )
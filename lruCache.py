@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cache LRU com expiração opcional, seguro entre threads: entradas antigas saem quando o tamanho
+# máximo é atingido ou, com `ttl` (segundos), quando expiram
+class LRUCache:
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None or (item[0] is not None and item[0] < time.monotonic()):
+                self._dados.pop(chave, None)
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return item[1]
+
+    def set(self, chave, valor):
+        if self.maxsize <= 0 or (self.ttl is not None and self.ttl <= 0):
+            return
+        expira = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._dados[chave] = (expira, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def metrics(self):
+        with self._lock:
+            metricas = {"entries": len(self._dados), "maxsize": self.maxsize,
+                        "hits": self.hits, "misses": self.misses}
+        if self.ttl is not None:
+            metricas["ttl_s"] = self.ttl
+        return metricas
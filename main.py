@@ -2,12 +2,12 @@ import openai
 from fastapi import FastAPI, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import pymysql
 import os
 import uuid
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from langchain.tools import StructuredTool
@@ -21,6 +21,18 @@ import logging
 from reportRoutes import router as report_router
 from dashboardRoutes import router as dashboard_router
 from chatRoutes import router as chat_router
+from metricsRoutes import router as metrics_router
+from exportRoutes import router as export_router
+from searchRoutes import router as search_router
+from dashboardEvents import hub, publish_comment_change
+from admissionControl import AdmissionMiddleware
+from llmScheduler import (
+    scheduler,
+    estimate_tokens,
+    ScheduledChatOpenAI,
+    SchedulerTimeoutError,
+    PRIORIDADE_INTERATIVA,
+)
 
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -84,18 +96,27 @@ logging.basicConfig(level=logging.DEBUG)
 
 app = FastAPI()
 
+# Controle de admissão por classe de endpoint; registrado antes do CORS para que
+# as respostas 503 de descarte também recebam os cabeçalhos de CORS
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Permite todas as origens (modifique para segurança)
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sem isto o navegador esconde do JS o cursor dos snapshots do dashboard e o Retry-After dos 503
+    expose_headers=["X-Dashboard-Cursor", "Retry-After"],
 )
 
 # Incluir routers para o dashboard
 app.include_router(report_router, prefix="/api")
 app.include_router(dashboard_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(export_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
 
 # Defina o esquema para o argumento
 class SentimentAnalysisInput(BaseModel):
@@ -108,8 +129,8 @@ class UserDetails(BaseModel):
     email: str
     unidade: str
 
-# Cria a pasta temporária para os áudios
-TEMP_DIR = "./temp_files"
+# Cria a pasta temporária para os áudios (TEMP_DIR permite usar outra, como nos benchmarks)
+TEMP_DIR = os.getenv("TEMP_DIR", "./temp_files")
 os.makedirs(TEMP_DIR, exist_ok=True)
 
 
@@ -117,6 +138,45 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 ################################## FUNÇÕES DE INSERÇÃO NO MySQL ###############################################
 
 
+# Função para ler unidade, sentimento e dia de um comentário (base dos deltas enviados ao dashboard)
+def fetch_comment_state(connection, record_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT unidade, sentimento, DATE(data_hora) AS data FROM comentarios_clientes WHERE id = %s",
+            (record_id,)
+        )
+        return cursor.fetchone()
+
+
+# Marca um estado que não pôde ser lido (None já significa "comentário ainda não existia")
+ESTADO_DESCONHECIDO = object()
+
+
+# Função para ler o estado usado pelo dashboard sem deixar uma falha de leitura derrubar a gravação
+def read_dashboard_state(connection, record_id):
+    try:
+        return fetch_comment_state(connection, record_id)
+    except Exception as e:
+        print(f"[ERROR] Erro ao ler o estado do comentário {record_id} para o dashboard: {str(e)}")
+        return ESTADO_DESCONHECIDO
+
+
+# Função para confirmar a gravação e publicar o delta do dashboard como um só passo.
+# O estado final é lido antes do commit (a própria conexão já enxerga a alteração), e commit e
+# publicação acontecem sob hub.write_lock, a mesma trava usada pelos snapshots do dashboard.
+# A notificação é acessória: se falhar, só é registrada, e o comentário continua gravado.
+def commit_and_publish(connection, record_id, antes):
+    depois = read_dashboard_state(connection, record_id)
+    with hub.write_lock:
+        connection.commit()
+        if antes is ESTADO_DESCONHECIDO or depois is ESTADO_DESCONHECIDO:
+            return
+        try:
+            publish_comment_change(antes, depois, record_id)
+        except Exception as e:
+            print(f"[ERROR] Erro ao publicar a alteração do comentário {record_id} no dashboard: {str(e)}")
+
+
 # Função para salvar dados iniciais no banco MySQL
 def save_initial_to_mysql(connection, comentario):
     try:
@@ -133,11 +193,13 @@ def save_initial_to_mysql(connection, comentario):
         with connection.cursor() as cursor:
             # Executar a inserção
             cursor.execute(sql, data)
-            connection.commit()
             # Obter o ID gerado automaticamente
             record_id = cursor.lastrowid
-            print(f"[DEBUG] Tentando salvar no banco de dados (1) com ID: {record_id}")
-            print(f"[INFO] Dados iniciais salvos com sucesso para Record ID: {record_id}")
+
+        # Confirma e avisa os dashboards conectados sobre o novo comentário
+        commit_and_publish(connection, record_id, None)
+        print(f"[DEBUG] Tentando salvar no banco de dados (1) com ID: {record_id}")
+        print(f"[INFO] Dados iniciais salvos com sucesso para Record ID: {record_id}")
 
         return record_id  # Retorna o ID gerado para uso posterior
 
@@ -161,12 +223,16 @@ def update_sentiment_to_mysql(connection, record_id, sentimento):
         print(f"[DEBUG] SQL Query: {sql}")
         print(f"[DEBUG] Dados para atualização: {data}")
 
+        # Estado anterior, para enviar ao dashboard apenas a diferença
+        antes = read_dashboard_state(connection, record_id)
+
         # Usando o gerenciador de contexto para o cursor
         with connection.cursor() as cursor:
             # Executar a atualização
             cursor.execute(sql, data)
-            connection.commit()
-            print(f"[INFO] Sentimento atualizado com sucesso para Record ID: {record_id}")
+
+        commit_and_publish(connection, record_id, antes)
+        print(f"[INFO] Sentimento atualizado com sucesso para Record ID: {record_id}")
 
     except Exception as e:
         print(f"Erro ao atualizar o sentimento no banco: {str(e)}")
@@ -185,16 +251,20 @@ def update_user_details_to_mysql(connection, record_id, nome_cliente, email, uni
         """
         data = (nome_cliente, email, unidade, record_id)
 
+        # Estado anterior, para enviar ao dashboard apenas a diferença
+        antes = read_dashboard_state(connection, record_id)
+
         # Bloco 'with' para o cursor
         with connection.cursor() as cursor:
             affected_rows = cursor.execute(sql, data)  # Verifica as linhas afetadas
             cursor.execute(sql, data)
-            connection.commit()
-            print(f"[DEBUG] Tentando salvar dados do usuário no banco de dados com ID: {record_id}")
-            if affected_rows == 0:
-                print(f"[ERROR] Nenhuma linha foi atualizada para Record ID: {record_id}")
-            else:
-                print(f"[INFO] {affected_rows} linha(s) atualizada(s) no banco para Record ID: {record_id}")
+
+        commit_and_publish(connection, record_id, antes)
+        print(f"[DEBUG] Tentando salvar dados do usuário no banco de dados com ID: {record_id}")
+        if affected_rows == 0:
+            print(f"[ERROR] Nenhuma linha foi atualizada para Record ID: {record_id}")
+        else:
+            print(f"[INFO] {affected_rows} linha(s) atualizada(s) no banco para Record ID: {record_id}")
 
     except Exception as e:
         print(f"Erro ao atualizar os detalhes do usuário no banco: {str(e)}")
@@ -207,13 +277,21 @@ def update_user_details_to_mysql(connection, record_id, nome_cliente, email, uni
 # Função para Gerar o Vetor do Comentário
 def gerar_vetor_comentario(comentario: str) -> list:
     try:
-        response = client.embeddings.create(
-            input=comentario,
-            model="text-embedding-ada-002"
+        # A chamada passa pelo agendador compartilhado, que controla limites e retries
+        response = scheduler.call(
+            lambda timeout: client.with_options(timeout=timeout, max_retries=0).embeddings.create(
+                input=comentario,
+                model="text-embedding-ada-002"
+            ),
+            model="text-embedding-ada-002",
+            priority=PRIORIDADE_INTERATIVA,
+            tokens=estimate_tokens(comentario, "text-embedding-ada-002"),
         )
         vetor = response.data[0].embedding  # Retorna o vetor
         # print(f"[DEBUG] Vetor gerado com sucesso: {vetor[:5]}...")  # Mostra os primeiros valores
         return vetor
+    except SchedulerTimeoutError:
+        raise  # Limite ou prazo do agendador: o endpoint responde 503 com Retry-After
     except Exception as e:
         print(f"[ERROR] Erro ao gerar vetor: {str(e)}")
         return None
@@ -226,10 +304,12 @@ def save_comment_to_pinecone(record_id, comentario, vetor, sentimento):
             raise ValueError("O vetor gerado é None. Não é possível salvar no Pinecone.")
 
         # Criação da metadata
+        agora = datetime.now(timezone.utc)  # Hora UTC para consistência
         metadata = {
             "comentario": comentario,
             "sentimento": sentimento,
-            "timestamp": str(datetime.now(timezone.utc)),  # Hora UTC para consistência
+            "timestamp": str(agora),
+            "timestamp_epoch": int(agora.timestamp()),  # Numérico, para filtros de período no Pinecone
         }
 
         # Validação antes de salvar os dados
@@ -314,7 +394,7 @@ def analyze_sentiment_function(transcription: str) -> str:
 
 
 # Inicializa o modelo LLM OpenAI
-chat_model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.0)
+chat_model = ScheduledChatOpenAI(model="gpt-3.5-turbo", temperature=0.0, priority=PRIORIDADE_INTERATIVA)
 
 # Registra a ferramenta de análise de sentimento no LangChain
 tools = [
@@ -340,6 +420,31 @@ agent = initialize_agent(
 
 
 
+############################################ TRANSCRIÇÃO DE ÁUDIO ###########################################################
+
+
+# Função para transcrever o áudio com o Whisper via agendador compartilhado
+def transcrever_audio(file_path: str) -> str:
+    # O arquivo é reaberto a cada tentativa, já que um retry precisa reenviar o conteúdo completo
+    def chamar_whisper(timeout):
+        with open(file_path, "rb") as audio_file:
+            return client.with_options(timeout=timeout, max_retries=0).audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+            )
+
+    response = scheduler.call(chamar_whisper, model="whisper-1", priority=PRIORIDADE_INTERATIVA)
+    return response.text  # Acessa o texto diretamente
+
+
+# Resposta 503 quando a OpenAI não atende dentro do prazo (limite de requisições ou fila cheia)
+def resposta_servico_indisponivel(mensagem, erro):
+    headers = {}
+    if erro.retry_after:
+        headers["Retry-After"] = str(max(1, round(erro.retry_after)))
+    return JSONResponse(content={"error": mensagem}, status_code=503, headers=headers)
+
+
 ############################################ ENDPOINTS PARA O FRONTEND ###########################################################
 
 # Rota raiz para teste
@@ -361,14 +466,9 @@ async def upload_audio(file: UploadFile = File(...)):
             f.write(content)
         print("[INFO] Arquivo salvo com sucesso!")
 
-        # Transcrição do áudio
+        # Transcrição do áudio (em thread, para não bloquear o event loop enquanto aguarda a fila)
         print("[INFO] Iniciando transcrição com Whisper...")
-        with open(file_path, "rb") as audio_file:
-            response = openai.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-            )
-        transcription = response.text  # Acessa o texto diretamente
+        transcription = await run_in_threadpool(transcrever_audio, file_path)
         print("[INFO] Transcrição concluída!")
 
         # Salva a transcrição como arquivo de texto
@@ -383,6 +483,9 @@ async def upload_audio(file: UploadFile = File(...)):
                 "transcription": transcription,
             }
         )
+    except SchedulerTimeoutError as e:
+        print(f"[ERROR] OpenAI indisponível para transcrição: {str(e)}")
+        return resposta_servico_indisponivel(f"Erro durante a transcrição: {str(e)}", e)
     except Exception as e:
         print(f"[ERROR] Erro durante o processo: {str(e)}")
         return JSONResponse(
@@ -407,7 +510,7 @@ async def analyze_sentiment(transcription: str = Query(...)):
         # Usa o agente para analisar o sentimento
         print("[INFO] Enviando transcrição para análise de sentimento...")
         print(f"[DEBUG] Transcrição recebida pelo agente: {transcription}")
-        result = agent.invoke({"input": transcription})
+        result = await run_in_threadpool(agent.invoke, {"input": transcription})
         print(f"[DEBUG] Resultado retornado pelo agente: {result}")
 
         # Certifique-se de que o resultado é uma string simples
@@ -433,7 +536,7 @@ async def analyze_sentiment(transcription: str = Query(...)):
         update_sentiment_to_mysql(get_mysql_connection(), record_id, sentiment)
 
         # Gerar vetor do comentário
-        vetor = gerar_vetor_comentario(transcription)  # Supondo que há uma função para gerar o vetor
+        vetor = await run_in_threadpool(gerar_vetor_comentario, transcription)  # Supondo que há uma função para gerar o vetor
         print(f"[DEBUG] Vetor gerado para o comentário: {vetor[:5]}...")
 
         # Salvar no Pinecone
@@ -450,6 +553,9 @@ async def analyze_sentiment(transcription: str = Query(...)):
                 "record_id": record_id  # Inclui o record_id no retorno
             }
         )
+    except SchedulerTimeoutError as e:
+        print(f"[ERROR] OpenAI indisponível para análise de sentimento: {str(e)}")
+        return resposta_servico_indisponivel(f"Erro durante a análise de sentimento: {str(e)}", e)
     except Exception as e:
         print(f"[ERROR] Erro durante a análise de sentimento: {str(e)}")
         print(f"[ERROR] Erro ao gerar vetor: {str(e)}")
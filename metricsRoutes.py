@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from llmScheduler import scheduler
+from admissionControl import admission
+from searchRoutes import search_metrics
+
+# Criação do router
+router = APIRouter()
+
+# Endpoint com profundidade da fila, tempos de espera e saldo dos limites das chamadas à OpenAI
+@router.get("/metrics/llm-scheduler")
+async def llm_scheduler_metrics():
+    return JSONResponse(content=scheduler.metrics())
+
+# Endpoint com ocupação, fila e descartes do controle de admissão por classe de endpoint
+@router.get("/metrics/admission")
+async def admission_metrics():
+    return JSONResponse(content=admission.metrics())
+
+# Endpoint com acertos dos caches de resultados e de embeddings da busca de comentários
+@router.get("/metrics/search")
+async def search_cache_metrics():
+    return JSONResponse(content=search_metrics())
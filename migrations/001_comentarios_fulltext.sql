@@ -0,0 +1,19 @@
+-- Índices para a busca de comentários (/api/search).
+--
+-- Aplicar uma única vez no banco de produção:
+--     mysql -h "$MYSQL_HOST" -u "$MYSQL_USER" -p "$MYSQL_DATABASE" < migrations/001_comentarios_fulltext.sql
+--
+-- A criação do primeiro índice FULLTEXT reconstrói a tabela (InnoDB); em tabelas grandes,
+-- rode fora do horário de pico. Termos com menos de innodb_ft_min_token_size (padrão 3)
+-- caracteres e as stopwords do InnoDB não são indexados; a busca os retira da consulta
+-- (STOPWORDS_FULLTEXT em commentQueries.py, a lista padrão INNODB_FT_DEFAULT_STOPWORD).
+
+ALTER TABLE comentarios_clientes
+    ADD FULLTEXT INDEX ft_comentarios_comentario (comentario);
+
+-- Filtros de unidade, sentimento e período usados pela busca, pelo relatório e pela exportação
+CREATE INDEX idx_comentarios_unidade_sentimento_data
+    ON comentarios_clientes (unidade, sentimento, data_hora);
+
+CREATE INDEX idx_comentarios_data_hora
+    ON comentarios_clientes (data_hora);
@@ -0,0 +1,132 @@
+"""Preenche `timestamp_epoch` nos vetores antigos do Pinecone (namespace comentarios_namespace).
+
+Os filtros de período do relatório e da busca usam `timestamp_epoch`, gravado apenas pelos
+vetores criados depois que o campo foi introduzido; sem este backfill, um período filtrado
+não encontra nenhum comentário antigo. Rodar uma vez, a partir da raiz do repositório:
+
+    python migrations/002_pinecone_timestamp_epoch.py --dry-run
+    python migrations/002_pinecone_timestamp_epoch.py
+
+O valor vem do `timestamp` já salvo na metadata (hora UTC da gravação, como nos vetores novos)
+ou, na falta dele, do `data_hora` do MySQL para o mesmo id, lido com a sessão em UTC (o mesmo
+referencial dos filtros de período). Vetores que já têm o campo são ignorados, então o script
+pode ser repetido com segurança.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+import pymysql
+from dotenv import load_dotenv
+from pinecone import Pinecone
+
+load_dotenv()  # Carregar variáveis de ambiente
+
+NAMESPACE = "comentarios_namespace"
+INDEX_NAME = "sym-comentarios"
+
+
+def get_mysql_connection():
+    return pymysql.connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE"),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor,
+        init_command="SET time_zone = '+00:00'"  # data_hora (TIMESTAMP) em UTC, independente do fuso do servidor
+    )
+
+
+# Segundos desde a época (UTC); datas sem fuso são tratadas como UTC
+def _epoch(valor):
+    if isinstance(valor, str):
+        try:
+            valor = datetime.fromisoformat(valor.strip())
+        except ValueError:
+            return None
+    if not isinstance(valor, datetime):
+        return None
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return int(valor.timestamp())
+
+
+# data_hora do MySQL para os ids sem `timestamp` na metadata
+def fetch_data_hora(ids):
+    numericos = [int(i) for i in ids if str(i).isdigit()]
+    if not numericos:
+        return {}
+    connection = get_mysql_connection()
+    try:
+        with connection.cursor() as cursor:
+            marcadores = ", ".join(["%s"] * len(numericos))
+            cursor.execute(
+                f"SELECT id, data_hora FROM comentarios_clientes WHERE id IN ({marcadores})",
+                numericos,
+            )
+            return {str(row["id"]): row["data_hora"] for row in cursor.fetchall()}
+    finally:
+        connection.close()
+
+
+# Processa um lote de ids; devolve (atualizados, já preenchidos, sem data conhecida)
+def backfill_batch(index, ids, dry_run=False):
+    resposta = index.fetch(ids=list(ids), namespace=NAMESPACE)
+    vetores = resposta.get("vectors", {}) or {}
+
+    pendentes = {}
+    ja_preenchidos = 0
+    for vid, vetor in vetores.items():
+        metadata = vetor.get("metadata") or {}
+        if "timestamp_epoch" in metadata:
+            ja_preenchidos += 1
+            continue
+        pendentes[vid] = _epoch(metadata.get("timestamp"))
+
+    sem_data = [vid for vid, epoch in pendentes.items() if epoch is None]
+    if sem_data:
+        datas = fetch_data_hora(sem_data)
+        for vid in sem_data:
+            pendentes[vid] = _epoch(datas.get(vid))
+
+    atualizados, ignorados = 0, 0
+    for vid, epoch in pendentes.items():
+        if epoch is None:
+            print(f"[WARN] Vetor {vid} sem timestamp na metadata nem data_hora no MySQL; ignorado.")
+            ignorados += 1
+            continue
+        if not dry_run:
+            index.update(id=vid, set_metadata={"timestamp_epoch": epoch}, namespace=NAMESPACE)
+        atualizados += 1
+    return atualizados, ja_preenchidos, ignorados
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill de timestamp_epoch nos vetores do Pinecone")
+    parser.add_argument("--batch-size", type=int, default=100, help="ids por fetch (máximo do Pinecone: 1000)")
+    parser.add_argument("--dry-run", action="store_true", help="só conta o que seria atualizado")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(INDEX_NAME)
+
+    totais = [0, 0, 0]
+    # index.list pagina os ids do namespace (índices serverless)
+    for ids in index.list(namespace=NAMESPACE, limit=args.batch_size):
+        for posicao, quantidade in enumerate(backfill_batch(index, ids, args.dry_run)):
+            totais[posicao] += quantidade
+        print(f"[INFO] {sum(totais)} vetores verificados...", file=sys.stderr)
+
+    acao = "a atualizar" if args.dry_run else "atualizados"
+    print(f"[INFO] {totais[0]} {acao}, {totais[1]} já tinham timestamp_epoch, {totais[2]} sem data conhecida.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import numpy as np
+
+from llmScheduler import estimate_tokens
+
+
+# Ordem fixa das colunas de sentimento na tabela; outros valores vão ao final
+SENTIMENTOS_TABELA = ["positivo", "negativo", "neutro"]
+
+
+# Corta o texto para caber em `max_tokens` (aproximação por proporção de caracteres)
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    tokens = estimate_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    limite = max(1, int(len(text) * max_tokens / tokens) - 3)
+    return text[:limite].rstrip() + "..."
+
+
+# Renderiza o resumo do MySQL como tabela compacta (unidade x sentimento) dentro do orçamento de tokens.
+# Unidades que não cabem são somadas em uma linha "outras".
+def render_summary_table(rows, token_budget: int, model: str) -> str:
+    por_unidade = {}
+    sentimentos = list(SENTIMENTOS_TABELA)
+    for row in rows:
+        unidade = row.get("unidade") or "(sem unidade)"
+        sentimento = row.get("sentimento") or "indefinido"
+        if sentimento not in sentimentos:
+            sentimentos.append(sentimento)
+        contagens = por_unidade.setdefault(unidade, {})
+        contagens[sentimento] = contagens.get(sentimento, 0) + int(row.get("total") or 0)
+
+    def linha(nome, contagens):
+        valores = [str(contagens.get(s, 0)) for s in sentimentos]
+        return "|".join([nome, str(sum(contagens.values()))] + valores)
+
+    total_geral = {}
+    for contagens in por_unidade.values():
+        for sentimento, total in contagens.items():
+            total_geral[sentimento] = total_geral.get(sentimento, 0) + total
+
+    cabecalho = "|".join(["unidade", "total"] + sentimentos)
+    rodape = linha("TOTAL", total_geral)
+    usados = estimate_tokens(cabecalho, model) + estimate_tokens(rodape, model) + 2
+
+    linhas = [cabecalho]
+    restantes = sorted(por_unidade.items(), key=lambda item: -sum(item[1].values()))
+    while restantes:
+        nome, contagens = restantes[0]
+        texto = linha(nome, contagens)
+        custo = estimate_tokens(texto, model) + 1
+        # Reserva espaço para a linha agregada caso nem todas as unidades caibam
+        reserva = estimate_tokens(linha(f"outras ({len(restantes)} unidades)", total_geral), model) + 1
+        if usados + custo + (reserva if len(restantes) > 1 else 0) > token_budget:
+            break
+        linhas.append(texto)
+        usados += custo
+        restantes.pop(0)
+
+    if restantes:
+        outras = {}
+        for _, contagens in restantes:
+            for sentimento, total in contagens.items():
+                outras[sentimento] = outras.get(sentimento, 0) + total
+        linhas.append(linha(f"outras ({len(restantes)} unidades)", outras))
+
+    linhas.append(rodape)
+    return "\n".join(linhas)
+
+
+# Seleciona comentários por Maximal Marginal Relevance até preencher o orçamento de tokens.
+# `matches` são resultados do Pinecone com `values` e `metadata`; `lambda_mult` pesa relevância x diversidade.
+def select_comments_mmr(query_vector, matches, token_budget: int, model: str, lambda_mult: float = 0.5,
+                        min_score: float = 0.0, max_comment_tokens: int = 200, text_key: str = "comentario"):
+    candidatos, vistos = [], set()
+    for match in matches:
+        texto = (match.get("metadata") or {}).get(text_key)
+        valores = match.get("values")
+        if not texto or match["score"] < min_score or texto in vistos or valores is None or len(valores) == 0:
+            continue
+        vistos.add(texto)
+        texto = truncate_to_tokens(texto, max_comment_tokens, model)
+        candidatos.append((texto, estimate_tokens(texto, model) + 2, valores))
+
+    if not candidatos:
+        return []
+
+    vetores = np.asarray([c[2] for c in candidatos], dtype=np.float32)
+    vetores /= np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+    consulta = np.asarray(query_vector, dtype=np.float32)
+    consulta /= max(np.linalg.norm(consulta), 1e-12)
+
+    relevancia = vetores @ consulta
+    similaridade_maxima = np.full(len(candidatos), -np.inf)
+    disponiveis = np.ones(len(candidatos), dtype=bool)
+
+    selecionados, usados = [], 0
+    while disponiveis.any():
+        redundancia = np.where(np.isinf(similaridade_maxima), 0.0, similaridade_maxima)
+        pontuacao = lambda_mult * relevancia - (1 - lambda_mult) * redundancia
+        pontuacao[~disponiveis] = -np.inf
+        escolhido = int(np.argmax(pontuacao))
+        disponiveis[escolhido] = False
+
+        texto, custo, _ = candidatos[escolhido]
+        if usados + custo > token_budget:
+            continue  # Não cabe; tenta um candidato menor
+        selecionados.append(texto)
+        usados += custo
+        similaridade_maxima = np.maximum(similaridade_maxima, vetores @ vetores[escolhido])
+
+    return selecionados
+
+
+# Formata os comentários selecionados como lista compacta para o prompt
+def render_comments(comentarios) -> str:
+    if not comentarios:
+        return "(nenhum comentário relevante encontrado)"
+    return "\n".join(f"- {c}" for c in comentarios)
@@ -1,15 +1,23 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import pymysql
 import os
+from datetime import date
+from typing import Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_community.vectorstores import Pinecone as PineconeVectorStore
 from pydantic import BaseModel
-# Importando e renomeando o Pinecone para gerenciamento do índice
-from pinecone import Pinecone as PineconeClient, ServerlessSpec
+from llmScheduler import (
+    ScheduledChatOpenAI,
+    SchedulerTimeoutError,
+    PRIORIDADE_RELATORIO,
+    estimate_tokens,
+)
+from reportContext import render_summary_table, render_comments, select_comments_mmr
+from commentQueries import MYSQL_SESSION_UTC, build_filters, build_pinecone_filter
+from commentVectors import embed_query, index
 
 
 load_dotenv()  # Carregar variáveis de ambiente
@@ -24,78 +32,85 @@ def get_mysql_connection():
         password=os.getenv("MYSQL_PASSWORD"),
         database=os.getenv("MYSQL_DATABASE"),
         charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
+        cursorclass=pymysql.cursors.DictCursor,
+        init_command=MYSQL_SESSION_UTC  # Mesmos limites de período em UTC do filtro do Pinecone
     )
 
-pc = PineconeClient(
-    api_key=os.getenv("PINECONE_API_KEY"),
-    environment="us-east-1"  # Substitua pela região configurada no Pinecone
-)
+# Criar modelo LLM (relatórios cedem a vez para chamadas interativas no agendador)
+llm = ScheduledChatOpenAI(model="gpt-4-turbo", temperature=0.2, priority=PRIORIDADE_RELATORIO)
 
-index_name = "sym-comentarios"
+# Orçamentos de tokens do contexto dos prompts (mantêm o tamanho do prompt previsível)
+SUMMARY_TOKEN_BUDGET = int(os.getenv("REPORT_SUMMARY_TOKENS", "600"))
+COMMENTS_TOKEN_BUDGET = int(os.getenv("REPORT_COMMENTS_TOKENS", "1500"))
+# Candidatos buscados no Pinecone antes da seleção por relevância e diversidade (MMR)
+FETCH_K = int(os.getenv("REPORT_FETCH_K", "50"))
+MMR_LAMBDA = float(os.getenv("REPORT_MMR_LAMBDA", "0.5"))
+MIN_SCORE = float(os.getenv("REPORT_MIN_SCORE", "0.5"))
 
-# Verifica se o índice existe
-if index_name not in [i.name for i in pc.list_indexes()]:
-    pc.create_index(
-        name=index_name,
-        dimension=1536,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1")
-    )
+# Função para buscar dados agregados do MySQL, opcionalmente restritos a uma unidade e a um período
+def fetch_sentiment_summary(unidade=None, data_inicio=None, data_fim=None):
+    condicoes, parametros = build_filters(unidade, None, data_inicio, data_fim)
+    where = ("WHERE " + " AND ".join(condicoes)) if condicoes else ""
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-ada-002",
-    api_key=os.getenv("OPENAI_API_KEY")
-)
-
-# Conecta ao índice
-index = pc.Index(index_name)
-
-# Configurando o vector_store
-vector_store = PineconeVectorStore(
-    index=index,
-    embedding=embeddings,
-    text_key="comentario",
-    namespace="comentarios_namespace"
-)
-
-# Criar modelo LLM
-llm = ChatOpenAI(model="gpt-4-turbo", temperature=0.2)
-
-# Função para buscar dados agregados do MySQL
-def fetch_sentiment_summary():
     connection = get_mysql_connection()
     with connection.cursor() as cursor:
-        query = """
+        query = f"""
         SELECT unidade, sentimento, COUNT(*) AS total
         FROM comentarios_clientes
+        {where}
         GROUP BY unidade, sentimento;
         """
-        cursor.execute(query)
+        cursor.execute(query, parametros)
         results = cursor.fetchall()
     connection.close()
     return results
 
-# Função para buscar comentários similares no Pinecone
-def fetch_pinecone_data(query_text):
-    results = vector_store.similarity_search_with_score(query_text, k=3)
+# Função para buscar comentários similares no Pinecone, escolhidos por MMR até o orçamento de tokens
+def fetch_pinecone_data(query_text, token_budget=COMMENTS_TOKEN_BUDGET, filtro=None):
+    query_vector = embed_query(query_text)
+    results = index.query(
+        vector=query_vector,
+        top_k=FETCH_K,
+        filter=filtro,
+        include_metadata=True,
+        include_values=True,  # Os vetores são usados para medir a diversidade entre comentários
+        namespace="comentarios_namespace"
+    )
 
     # Log dos resultados para depuração
-    print("Resultados do Pinecone:", results)
+    print("Candidatos do Pinecone:", len(results["matches"]))
+
+    return select_comments_mmr(
+        query_vector,
+        results["matches"],
+        token_budget,
+        llm.model_name,
+        lambda_mult=MMR_LAMBDA,
+        min_score=MIN_SCORE,
+    )
 
-    # Validação para garantir que 'page_content' existe antes de acessar
-    filtered_results = [
-        res.page_content for res, score in results
-        if hasattr(res, "page_content") and score >= 0.8
-    ]
 
-    return filtered_results
+# Descrição legível do escopo do relatório para os prompts
+def describe_scope(unidade=None, data_inicio=None, data_fim=None):
+    partes = []
+    if unidade:
+        partes.append(f"unidade {unidade}")
+    if data_inicio and data_fim:
+        partes.append(f"de {data_inicio.isoformat()} a {data_fim.isoformat()}")
+    elif data_inicio:
+        partes.append(f"a partir de {data_inicio.isoformat()}")
+    elif data_fim:
+        partes.append(f"até {data_fim.isoformat()}")
+    return ", ".join(partes)
 
 
 # Definir o modelo esperado pelo corpo JSON
 class ReportInput(BaseModel):
     meta: str
     query: str
+    unidade: Optional[str] = None
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
 
 # Endpoint atualizado para receber os dados no corpo JSON
 @router.post("/generate-report")
@@ -107,29 +122,48 @@ async def generate_report(input_data: ReportInput):
         print("Meta recebida:", meta)
         print("Query recebida:", query)
 
-        # Buscar dados do MySQL
-        mysql_summary = fetch_sentiment_summary()
-        print("Resumo do MySQL:", mysql_summary)
+        # Filtros opcionais de unidade e período, aplicados ao MySQL e ao Pinecone
+        unidade = input_data.unidade
+        data_inicio = input_data.data_inicio
+        data_fim = input_data.data_fim
+        if data_inicio and data_fim and data_inicio > data_fim:
+            return JSONResponse(content={"error": "data_inicio deve ser anterior ou igual a data_fim."}, status_code=400)
+        print("Filtros recebidos:", {"unidade": unidade, "data_inicio": data_inicio, "data_fim": data_fim})
+
+        # Buscar dados do MySQL e renderizar como tabela compacta
+        mysql_summary = fetch_sentiment_summary(unidade, data_inicio, data_fim)
+        escopo = describe_scope(unidade, data_inicio, data_fim)
+        linha_escopo = f"Escopo: {escopo}\n" if escopo else ""
+        # A linha de escopo conta dentro do orçamento do resumo
+        orcamento_tabela = SUMMARY_TOKEN_BUDGET - estimate_tokens(linha_escopo, llm.model_name)
+        resumo_tabela = linha_escopo + render_summary_table(mysql_summary, orcamento_tabela, llm.model_name)
+        print("Resumo do MySQL:\n" + resumo_tabela)
 
         # Buscar dados do Pinecone
-        pinecone_comments = fetch_pinecone_data(query)
-        print("Comentários do Pinecone:", pinecone_comments)
+        filtro = build_pinecone_filter(unidade, data_inicio, data_fim)
+        pinecone_comments = await run_in_threadpool(
+            fetch_pinecone_data, query, COMMENTS_TOKEN_BUDGET, filtro
+        )
+        print("Comentários do Pinecone selecionados:", len(pinecone_comments))
 
         # Criar prompt templates e chains
         prompt_metas = PromptTemplate(
             input_variables=["metas", "comentarios"],
             template=(
                 "Metas da empresa: {metas}\n\n"
-                "Resumo dos comentários por unidade: {comentarios}\n\n"
+                "Resumo dos comentários por unidade (unidade|total|contagem por sentimento):\n{comentarios}\n\n"
                 "Analise se as metas foram atingidas com base nos comentários. Gere uma resposta formal."
             )
         )
 
+        # O resumo do MySQL vai só para a análise de metas; a de mercado parte dos exemplos do
+        # banco vetorial, sem pagar a tabela de novo no prompt
         prompt_market = PromptTemplate(
-            input_variables=["comentarios", "pinecone"],
+            input_variables=["escopo", "pinecone"],
             template=(
-                "Analise os seguintes comentários por unidade: {comentarios}\n\n"
-                "Compare com os seguintes exemplos do banco vetorial: {pinecone}\n\n"
+                "Escopo: {escopo}\n\n"
+                "A distribuição de sentimentos por unidade já foi analisada na seção de metas. "
+                "Analise os seguintes exemplos de comentários do banco vetorial:\n{pinecone}\n\n"
                 "Apresente tendências e insights do mercado."
             )
         )
@@ -140,16 +174,16 @@ async def generate_report(input_data: ReportInput):
 
         # Invocar respostas
         print("Executando chain metas...")
-        resultado_metas = chain_metas.invoke({
+        resultado_metas = await run_in_threadpool(chain_metas.invoke, {
             "metas": meta, 
-            "comentarios": str(mysql_summary)
+            "comentarios": resumo_tabela
         })
         print("Resultado Metas:", resultado_metas)
 
         print("Executando chain mercado...")
-        resultado_market = chain_market.invoke({
-            "comentarios": str(mysql_summary), 
-            "pinecone": str(pinecone_comments)
+        resultado_market = await run_in_threadpool(chain_market.invoke, {
+            "escopo": escopo or "todas as unidades, todo o período",
+            "pinecone": render_comments(pinecone_comments)
         })
         print("Resultado Mercado:", resultado_market)
 
@@ -162,6 +196,11 @@ async def generate_report(input_data: ReportInput):
 
         return JSONResponse(content={"report": report})
 
+    except SchedulerTimeoutError as e:
+        print("OpenAI indisponível para o relatório:", str(e))
+        headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else {}
+        return JSONResponse(content={"error": str(e)}, status_code=503, headers=headers)
+
     except Exception as e:
         print("Erro durante a execução:", str(e))
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -0,0 +1,241 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import os
+import time
+from datetime import date, datetime
+from typing import Literal, Optional
+from dotenv import load_dotenv
+import pymysql
+
+from commentQueries import MYSQL_SESSION_UTC, build_filters, build_pinecone_filter, fulltext_terms
+from commentVectors import embed_query, embedding_cache, index
+from lruCache import LRUCache
+from llmScheduler import SchedulerTimeoutError, PRIORIDADE_INTERATIVA
+
+
+load_dotenv()  # Carregar variáveis de ambiente
+
+router = APIRouter()
+
+# Candidatos buscados em cada fonte (palavra-chave e vetorial) antes da fusão; limita a paginação
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "100"))
+# Constante k da reciprocal rank fusion: valores maiores achatam a vantagem das primeiras posições
+RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+# Tempo máximo da consulta FULLTEXT no MySQL (hint MAX_EXECUTION_TIME, MySQL 5.7+); acima disso vale só a vetorial
+KEYWORD_TIMEOUT_MS = int(os.getenv("SEARCH_KEYWORD_TIMEOUT_MS", "1000"))
+# Tempo máximo da busca vetorial (embedding + Pinecone); acima disso responde só com a busca por palavra-chave
+SEMANTIC_TIMEOUT = float(os.getenv("SEARCH_SEMANTIC_TIMEOUT_SECONDS", "2.0"))
+# Cache de resultados fundidos (a paginação reaproveita a mesma lista)
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+
+# Conectar ao MySQL
+def get_mysql_connection():
+    return pymysql.connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE"),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor,
+        init_command=MYSQL_SESSION_UTC  # Mesmos limites de período em UTC do filtro do Pinecone
+    )
+
+
+# Cache de resultados fundidos por consulta e filtros
+result_cache = LRUCache(CACHE_SIZE, CACHE_TTL)
+
+
+# Normaliza espaços e caixa para que variações triviais da consulta reaproveitem os caches
+def normalize_query(texto):
+    return " ".join(texto.split()).lower()
+
+# Converte a consulta para o modo booleano com todos os termos obrigatórios (+termo).
+# No modo natural qualquer termo comum ("atendimento") casaria com boa parte da tabela, e o MySQL
+# calcularia a relevância de todas essas linhas; a recuperação ampla fica por conta da busca vetorial.
+# Termos curtos e stopwords do InnoDB não são indexados e por isso ficam de fora: como obrigatórios,
+# zerariam o resultado ("problema com entrega" viraria +problema +com +entrega).
+def boolean_query(query_text):
+    termos = fulltext_terms(query_text)
+    return " ".join(f"+{t}" for t in dict.fromkeys(termos))
+
+# Função para buscar por palavra-chave no índice FULLTEXT do MySQL (migrations/001_comentarios_fulltext.sql)
+def keyword_search(query_text, unidade=None, sentimento=None, data_inicio=None, data_fim=None,
+                   limite=SEARCH_CANDIDATES):
+    termos = boolean_query(query_text)
+    if not termos:
+        return []
+    condicoes, parametros = build_filters(unidade, sentimento, data_inicio, data_fim)
+    where = " AND ".join(["MATCH(comentario) AGAINST (%s IN BOOLEAN MODE)"] + condicoes)
+    query = f"""
+        SELECT /*+ MAX_EXECUTION_TIME({int(KEYWORD_TIMEOUT_MS)}) */
+            id, MATCH(comentario) AGAINST (%s IN BOOLEAN MODE) AS score
+        FROM comentarios_clientes
+        WHERE {where}
+        ORDER BY score DESC
+        LIMIT {int(limite)}
+    """
+    connection = get_mysql_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query, [termos, termos] + parametros)
+            return [int(row["id"]) for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+# Função para buscar por similaridade no Pinecone, com os mesmos filtros aplicados como metadata.
+# O embedding usa o cache compartilhado com os relatórios, com prioridade interativa: o usuário está esperando
+def semantic_search(query_text, unidade=None, sentimento=None, data_inicio=None, data_fim=None,
+                    limite=SEARCH_CANDIDATES):
+    results = index.query(
+        vector=embed_query(query_text, priority=PRIORIDADE_INTERATIVA),
+        top_k=limite,
+        filter=build_pinecone_filter(unidade, data_inicio, data_fim, sentimento),
+        include_metadata=False,
+        namespace="comentarios_namespace"
+    )
+    ids = []
+    for match in results["matches"]:
+        try:
+            ids.append(int(match["id"]))
+        except (TypeError, ValueError):
+            continue  # Vetor sem correspondente numérico no MySQL
+    return ids
+
+# Combina listas ranqueadas pela reciprocal rank fusion: score(d) = soma de 1 / (k + posição de d em cada lista)
+def reciprocal_rank_fusion(listas, k=RRF_K):
+    scores, posicoes = {}, {}
+    for nome, ids in listas.items():
+        for posicao, record_id in enumerate(ids, start=1):
+            scores[record_id] = scores.get(record_id, 0.0) + 1.0 / (k + posicao)
+            posicoes.setdefault(record_id, {})[nome] = posicao
+    ordem = sorted(scores, key=lambda record_id: (-scores[record_id], record_id))
+    return [(record_id, scores[record_id], posicoes[record_id]) for record_id in ordem]
+
+# Função para carregar do MySQL os comentários da página (a ordem vem da fusão)
+def fetch_comments(ids):
+    if not ids:
+        return {}
+    marcadores = ", ".join(["%s"] * len(ids))
+    connection = get_mysql_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, comentario, sentimento, unidade, data_hora FROM comentarios_clientes WHERE id IN ({marcadores})",
+                list(ids),
+            )
+            return {int(row["id"]): row for row in cursor.fetchall()}
+    finally:
+        connection.close()
+
+
+def search_metrics():
+    return {
+        "results": result_cache.metrics(),
+        "embeddings": embedding_cache.metrics(),
+    }
+
+
+def _formatar_data(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+# Executa as fontes da busca em paralelo; a vetorial tem tempo limite próprio
+async def ranked_ids(query_text, mode, filtros):
+    fontes = {}
+    if mode in ("hybrid", "keyword"):
+        fontes["keyword"] = asyncio.ensure_future(run_in_threadpool(keyword_search, query_text, **filtros))
+    if mode in ("hybrid", "semantic"):
+        fontes["semantic"] = asyncio.ensure_future(asyncio.wait_for(
+            run_in_threadpool(semantic_search, query_text, **filtros), SEMANTIC_TIMEOUT
+        ))
+
+    listas, falhas, erro = {}, [], None
+    for nome, tarefa in fontes.items():
+        try:
+            listas[nome] = await tarefa
+        except Exception as e:
+            print(f"[ERROR] Busca {nome} indisponível: {type(e).__name__}: {str(e)}")
+            falhas.append(nome)
+            erro = e
+    # Na busca híbrida, uma fonte basta para responder; sem nenhuma, o erro sobe
+    if not listas:
+        raise erro
+    return listas, falhas
+
+
+# Endpoint de busca híbrida: FULLTEXT do MySQL + similaridade do Pinecone, combinados por RRF
+@router.get("/search")
+async def search_comments(
+    q: str = Query(..., min_length=2, max_length=500),
+    mode: Literal["hybrid", "keyword", "semantic"] = Query("hybrid"),
+    unidade: Optional[str] = Query(None),
+    sentimento: Optional[str] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    inicio = time.perf_counter()
+    if data_inicio and data_fim and data_inicio > data_fim:
+        return JSONResponse(content={"error": "data_inicio deve ser anterior ou igual a data_fim."}, status_code=400)
+
+    query_text = normalize_query(q)
+    filtros = {"unidade": unidade, "sentimento": sentimento, "data_inicio": data_inicio, "data_fim": data_fim}
+    chave = (query_text, mode, unidade, sentimento, data_inicio, data_fim)
+
+    try:
+        fundidos = result_cache.get(chave)
+        cached = fundidos is not None
+        falhas = []
+        if not cached:
+            listas, falhas = await ranked_ids(query_text, mode, filtros)
+            fundidos = reciprocal_rank_fusion(listas)
+            # Resultados parciais (uma fonte falhou) não entram no cache
+            if not falhas:
+                result_cache.set(chave, fundidos)
+
+        pagina = fundidos[(page - 1) * page_size:page * page_size]
+        comentarios = await run_in_threadpool(fetch_comments, [record_id for record_id, _, _ in pagina])
+    except (asyncio.TimeoutError, SchedulerTimeoutError) as e:
+        print(f"[ERROR] Busca sem resposta dentro do prazo: {type(e).__name__}")
+        return JSONResponse(
+            content={"error": "Busca temporariamente indisponível. Tente novamente."},
+            status_code=503,
+            headers={"Retry-After": "2"},
+        )
+    except Exception as e:
+        print(f"[ERROR] Erro na busca de comentários: {str(e)}")
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+    resultados = []
+    for record_id, score, posicoes in pagina:
+        row = comentarios.get(record_id)
+        if row is None:
+            continue  # Removido do MySQL depois de indexado
+        resultados.append({
+            "id": record_id,
+            "comentario": row["comentario"],
+            "sentimento": row["sentimento"],
+            "unidade": row["unidade"],
+            "data_hora": _formatar_data(row["data_hora"]),
+            "score": round(score, 6),
+            "keyword_rank": posicoes.get("keyword"),
+            "semantic_rank": posicoes.get("semantic"),
+        })
+
+    return {
+        "query": q,
+        "mode": mode,
+        "page": page,
+        "page_size": page_size,
+        "total": len(fundidos),
+        "results": resultados,
+        "cached": cached,
+        "degraded": falhas,
+        "took_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }